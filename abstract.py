@@ -1,7 +1,10 @@
 from abc import ABC, abstractmethod
+import numpy as np
 
 
 class AbstractGame(ABC):
+    __slots__ = ()
+
     @staticmethod
     @abstractmethod
     def from_repr(representation: str):
@@ -13,12 +16,27 @@ class AbstractSimulation(ABC):
     def result(self, string: str) -> list[str]:
         ...
 
+    @abstractmethod
+    def result_many(self, strings) -> np.ndarray:
+        """Pattern codes (see feedback) of many guesses against the solution, scored together."""
+        ...
+
+    @staticmethod
+    @abstractmethod
+    def result_many_solutions(string: str, solutions) -> np.ndarray:
+        """Pattern codes of one guess against many solutions, scored together."""
+        ...
+
 
 class AbstractRunner(ABC):
     @abstractmethod
     def add_try(self, string: str, result: str) -> None:
         ...
 
+    @abstractmethod
+    def pop_try(self):
+        ...
+
     @abstractmethod
     def get_data(self):
         ...
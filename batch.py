@@ -0,0 +1,145 @@
+"""
+Runs JSONL jobs against the saved games without any prompt: one json object per input line,
+one json result per output line, in the same order. Controllers (and their word lists) stay loaded
+for the whole run.
+
+    python batch.py [--settings settings.toml] < jobs.jsonl > results.jsonl
+
+    {"op": "save", "game": "wordle", "solution": "leave", "tries": ["close", "leave"], "date": "2024-01-01"}
+    {"op": "get", "game": "nerdle", "date": "2024-01-01"}    (without a date, the last saved game)
+    {"op": "solve", "game": "wordle", "tries": ["close"], "results": ["G_Y__"], "limit": 20, "suggest": 5}
+    {"op": "stats", "game": "wordle"}
+
+Results are {"ok": true, ...} or {"ok": false, "error": "..."}, with the "id" of the job if it had one.
+"""
+from main import load_repositories, wordle_settings
+from wordle import WordleCtrl, WordleGame, WordleRunner, WordleSimulation
+from nerdle import NerdleCtrl, NerdleGame, NerdleSimulation
+from equation import is_valid_equation
+import instrument
+import argparse
+import datetime
+import json
+import sys
+
+
+def game_to_dict(game) -> dict:
+    return {"date": game.date.isoformat(), "tries": game.tries, "results": game.results, "solution": game.solution}
+
+
+class Batch:
+    def __init__(self, word_ctrl, nerd_ctrl):
+        self.word_ctrl = word_ctrl
+        self.nerd_ctrl = nerd_ctrl
+
+    def run(self, lines, out) -> int:
+        """Answers every job line, flushing after each so it can sit in a pipeline. Returns the number of jobs."""
+        jobs = 0
+        for line in lines:
+            if not line.strip():
+                continue
+            out.write(json.dumps(self.handle(line)) + "\n")
+            out.flush()
+            jobs += 1
+        return jobs
+
+    def handle(self, line: str) -> dict:
+        try:
+            job = json.loads(line)
+            if not isinstance(job, dict):
+                raise ValueError("A job must be a json object.")
+        except ValueError as e:
+            return {"ok": False, "error": f"Invalid job: {e}"}
+
+        try:
+            match job.get("op"):
+                case "save":
+                    result = self.save(job)
+                case "get":
+                    result = self.get(job)
+                case "solve":
+                    result = self.solve(job)
+                case "stats":
+                    result = self.stats(job)
+                case op:
+                    raise ValueError(f"Unknown op '{op}'.")
+            result = {"ok": True, **result}
+        except Exception as e:
+            result = {"ok": False, "error": str(e)}
+
+        if "id" in job:
+            result["id"] = job["id"]
+        return result
+
+    def _ctrl(self, job: dict):
+        match str(job.get("game", "")).lower():
+            case "wordle":
+                return self.word_ctrl
+            case "nerdle":
+                return self.nerd_ctrl
+        raise ValueError("'game' must be 'wordle' or 'nerdle'.")
+
+    @staticmethod
+    def _date(job: dict):
+        return job.get("date") and datetime.date.fromisoformat(job["date"])
+
+    def save(self, job: dict) -> dict:
+        ctrl = self._ctrl(job)
+        solution, tries = job["solution"].lower(), [t.lower() for t in job["tries"]]
+        if not 1 <= len(tries) <= 6:
+            raise ValueError("A game has between 1 and 6 tries.")
+
+        if ctrl is self.word_ctrl:
+            for word in [solution] + tries:
+                WordleRunner.validate_try(word)
+            simulation, game_class = WordleSimulation(solution), WordleGame
+        else:
+            for equation in [solution] + tries:
+                if not is_valid_equation(equation):
+                    raise ValueError(f"Invalid equation '{equation}'.")
+            simulation, game_class = NerdleSimulation(solution), NerdleGame
+
+        results = [simulation.result(word) for word in tries]
+        game = game_class(Batch._date(job) or datetime.date.today(), tries, results, solution)
+        ctrl.store(game)
+        return {"game": game_to_dict(game)}
+
+    def get(self, job: dict) -> dict:
+        game = self._ctrl(job).get(Batch._date(job))
+        return {"game": game and game_to_dict(game)}
+
+    def solve(self, job: dict) -> dict:
+        ctrl = self._ctrl(job)
+        tries, results = job.get("tries", []), job.get("results", [])
+        if len(tries) != len(results):
+            raise ValueError("'tries' and 'results' must have the same length.")
+
+        ctrl.start()
+        for tried, result in zip(tries, results):
+            ctrl.add_try(tried, result)
+        answer = {"count": len(ctrl.candidates), "solutions": ctrl.candidates.words(job.get("limit"))}
+        if job.get("suggest"):
+            if ctrl is not self.word_ctrl:
+                raise ValueError("Suggestions not available for Nerdle.")
+            answer["suggestions"] = ctrl.suggest_guesses(int(job["suggest"]))
+        return answer
+
+    def stats(self, job: dict) -> dict:
+        stats = self._ctrl(job).get_summary()
+        longest = stats.longest_streak()
+        return {
+            "games": stats.games,
+            "histogram": {str(score): n for score, n in sorted(stats.histogram.items())},
+            "longest_streak": longest and [longest[0], longest[1].isoformat(), longest[2].isoformat()],
+            "current_streak": stats.current_streak(),
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run JSONL jobs from stdin, writing JSONL results to stdout")
+    parser.add_argument("--settings", default="settings.toml")
+    args = parser.parse_args()
+
+    instrument.configure(args.settings)
+    word_repo, nerd_repo = load_repositories(args.settings)
+    Batch(WordleCtrl(word_repo, **wordle_settings(args.settings)), NerdleCtrl(nerd_repo)).run(sys.stdin, sys.stdout)
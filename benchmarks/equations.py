@@ -0,0 +1,57 @@
+"""
+Validation of 100k Nerdle equations (valid ones from the equation space and random strings
+of the same alphabet) with the previous eval based check and with the equation module.
+
+    python -m benchmarks.equations [--count 100000]
+"""
+from equation import generate_equations, evaluate, is_valid_equation, validate_many
+import argparse
+import json
+import random
+import time
+
+
+def eval_is_valid(equation: str) -> bool:
+    try:
+        ls, rs = equation.split("=")
+        return len(equation) == 8 and eval(ls, {"__builtins__": {}}, {}) == eval(rs, {"__builtins__": {}}, {})
+    except Exception:
+        return False
+
+
+def sample(count: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    valid = generate_equations()
+    equations = rng.choices(valid, k=count // 2)
+    while len(equations) < count:
+        lhs = "".join(rng.choice("0123456789+-*/") for _ in range(rng.randint(4, 6)))
+        equations.append(f"{lhs}={rng.randint(0, 10 ** (7 - len(lhs)) - 1)}")
+    rng.shuffle(equations)
+    return equations
+
+
+def timed(function, equations) -> float:
+    start = time.perf_counter()
+    function(equations)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Equation validation benchmark")
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+
+    equations = sample(args.count)
+    evaluate.cache_clear()
+    report = {
+        "equations": len(equations),
+        "eval_s": timed(lambda eqs: [eval_is_valid(e) for e in eqs], equations),
+        "is_valid_equation_s": timed(lambda eqs: [is_valid_equation(e) for e in eqs], equations),
+        "validate_many_s": timed(validate_many, equations),
+    }
+    report["speedup"] = report["eval_s"] / report["validate_many_s"]
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
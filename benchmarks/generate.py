@@ -0,0 +1,61 @@
+"""
+Synthetic word lists, equations and game histories for the benchmarks, reproducible from a seed.
+"""
+from wordle import WordleGame, WordleSimulation
+from nerdle import NerdleSimulation
+from equation import generate_equations
+import datetime
+import random
+
+
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def synthetic_words(n: int = 12000, length: int = 5, seed: int = 0) -> list[str]:
+    """About n distinct random words (duplicates drawn are dropped), sorted."""
+    rng = random.Random(seed)
+    return sorted({"".join(rng.choice(LETTERS) for _ in range(length)) for _ in range(n)})
+
+
+def synthetic_equations(n: int | None = None, seed: int = 0) -> list[str]:
+    """Valid 8 character equations: all of them, or a sorted sample of n."""
+    equations = generate_equations()
+    if n is None or n >= len(equations):
+        return equations
+    return sorted(random.Random(seed).sample(equations, n))
+
+
+def synthetic_games(game_class, n: int, words: list[str], seed: int = 0, start: datetime.date = datetime.date(2000, 1, 1),
+                    gap_rate: float = 0.05, fail_rate: float = 0.05):
+    """
+    n games on increasing dates (a day is skipped with probability gap_rate, so there are several streaks),
+    each with 1 to 6 tries ending with the solution, or 6 wrong tries with probability fail_rate.
+    """
+    rng = random.Random(seed)
+    simulation_class = WordleSimulation if game_class is WordleGame else NerdleSimulation
+    date = start
+    for _ in range(n):
+        solution = rng.choice(words)
+        if rng.random() < fail_rate:
+            tries = rng.sample(words, 6)
+        else:
+            tries = rng.sample(words, rng.randint(0, 5)) + [solution]
+        simulation = simulation_class(solution)
+        yield game_class(date, tries, [simulation.result(t) for t in tries], solution)
+        date += datetime.timedelta(days=2 if rng.random() < gap_rate else 1)
+
+
+def fill(repo, games, chunk_size: int = 10000) -> None:
+    """Saves the games in bulk: add_many where the repository has it, otherwise by appending to its csv file."""
+    if hasattr(repo, "add_many"):
+        chunk = []
+        for game in games:
+            chunk.append(game)
+            if len(chunk) == chunk_size:
+                repo.add_many(chunk)
+                chunk = []
+        repo.add_many(chunk)
+    else:
+        with open(repo.filename, "a") as f:
+            for game in games:
+                f.write(repr(game) + "\n")
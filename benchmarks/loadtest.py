@@ -0,0 +1,130 @@
+"""
+Load test for server.py: concurrent clients each play checker sessions (start, a few tries, solutions,
+end) over keep-alive connections, then p50/p99 latency and requests/sec are reported as json.
+Without --url, a local instance is started on a synthetic word list, so no network is needed.
+
+    python -m benchmarks.loadtest [--url http://127.0.0.1:8080] [--clients 32] [--sessions 20] [--suggest]
+"""
+from benchmarks.generate import synthetic_words
+from wordtable import word_result
+from urllib.parse import urlsplit
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Client:
+    """HTTP/1.1 json client over one keep-alive connection."""
+    def __init__(self, host: str, port: int):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, body: dict|None = None) -> tuple[int, dict]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        content = json.dumps(body).encode() if body is not None else b""
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\nContent-Length: {len(content)}\r\n\r\n"
+        self.writer.write(head.encode("latin-1") + content)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while (line := await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        payload = json.loads(await self.reader.readexactly(int(headers["content-length"])))
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, payload
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+async def play_sessions(client: Client, words: list[str], sessions: int, suggest: bool, rng: random.Random, latencies: list[float]):
+    async def timed(method, path, body=None):
+        start = time.perf_counter()
+        status, payload = await client.request(method, path, body)
+        latencies.append(time.perf_counter() - start)
+        if status >= 400:
+            raise RuntimeError(f"{method} {path}: {status} {payload}")
+        return payload
+
+    for _ in range(sessions):
+        solution = rng.choice(words)
+        session = (await timed("POST", "/sessions", {"game": "wordle"}))["session"]
+        for guess in rng.sample(words, 3):
+            await timed("POST", f"/sessions/{session}/tries", {"try": guess, "result": word_result(guess, solution)})
+            await timed("GET", f"/sessions/{session}/solutions?limit=20")
+        if suggest:
+            await timed("GET", f"/sessions/{session}/suggestions?k=5")
+        await timed("DELETE", f"/sessions/{session}")
+    await client.close()
+
+
+async def load(host: str, port: int, words: list[str], clients: int, sessions: int, suggest: bool) -> dict:
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(play_sessions(Client(host, port), words, sessions, suggest, random.Random(i), latencies)
+                           for i in range(clients)))
+    seconds = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "seconds": seconds,
+        "requests_per_second": len(latencies) / seconds,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+
+def spawn_server(cwd: str, words: list[str]) -> tuple[subprocess.Popen, str, int]:
+    """Local server on a free port, serving the given words."""
+    os.makedirs(os.path.join(cwd, "data"))
+    source = os.path.join(cwd, "words.txt")
+    with open(source, "w") as f:
+        f.write("\n".join(words) + "\n")
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "server.py"), "--port", "0", "--words", source],
+                            cwd=cwd, stdout=subprocess.PIPE, text=True)
+    url = urlsplit(proc.stdout.readline().split()[-1])
+    return proc, url.hostname, url.port
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test of the checker service")
+    parser.add_argument("--url", default=None, help="running instance to test, one is started otherwise")
+    parser.add_argument("--clients", type=int, default=32, help="concurrent connections")
+    parser.add_argument("--sessions", type=int, default=20, help="sessions played by each client")
+    parser.add_argument("--suggest", action="store_true", help="also ask for suggestions in every session")
+    args = parser.parse_args()
+
+    words = synthetic_words()
+    if args.url is not None:
+        url = urlsplit(args.url)
+        report = asyncio.run(load(url.hostname, url.port, words, args.clients, args.sessions, args.suggest))
+    else:
+        with tempfile.TemporaryDirectory() as cwd:
+            proc, host, port = spawn_server(cwd, words)
+            try:
+                report = asyncio.run(load(host, port, words, args.clients, args.sessions, args.suggest))
+            finally:
+                proc.terminate()
+                proc.wait()
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Startup benchmark for the CLI: import time of main.py (from `python -X importtime`) and the wall time
+until the first prompt is answered. Fails when a budget is exceeded or a lazily loaded dependency
+gets imported at startup.
+
+    python -m benchmarks.startup [--runs 10] [--import-budget 300] [--prompt-budget 600]
+"""
+from wordlist import write_table
+from utils import WORDS_LIST_LINK
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAZY_MODULES = ("matplotlib", "requests")
+
+
+def import_time(cwd: str) -> tuple[float, set[str]]:
+    """Cumulative import time of main in ms and the top level packages it pulled in."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                          cwd=cwd, env={**os.environ, "PYTHONPATH": ROOT}, capture_output=True, text=True, check=True)
+    total, modules = 0.0, set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        modules.add(name.strip().split(".")[0])
+        if name.strip() == "main":
+            total = int(cumulative) / 1000
+    return total, modules
+
+
+def first_prompt_time(cwd: str) -> float:
+    """Wall time in ms of starting the CLI and quitting at the first prompt."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(ROOT, "main.py")], cwd=cwd, input="exit\n",
+                   capture_output=True, text=True, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def prepare(cwd: str) -> None:
+    """Data directory with a cached word list, so the CLI starts without network."""
+    os.makedirs(os.path.join(cwd, "data"))
+    cache = os.path.join(cwd, "data", "cache", f"words_{hashlib.sha1(WORDS_LIST_LINK.encode()).hexdigest()[:12]}.bin")
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    write_table(cache, [a + b + c + "es" for a in letters for b in "aeiou" for c in letters][:15000])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI startup benchmark")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--import-budget", type=float, default=300, help="median import time budget in ms")
+    parser.add_argument("--prompt-budget", type=float, default=600, help="median time to first prompt budget in ms")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cwd:
+        prepare(cwd)
+        imports = [import_time(cwd) for _ in range(args.runs)]
+        prompts = [first_prompt_time(cwd) for _ in range(args.runs)]
+
+    report = {
+        "import_ms": statistics.median(t for t, _ in imports),
+        "first_prompt_ms": statistics.median(prompts),
+        "eager_lazy_modules": sorted(set(LAZY_MODULES) & imports[0][1]),
+    }
+    print(json.dumps(report))
+
+    failed = report["eager_lazy_modules"] != []
+    failed |= report["import_ms"] > args.import_budget
+    failed |= report["first_prompt_ms"] > args.prompt_budget
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
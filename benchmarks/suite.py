@@ -0,0 +1,191 @@
+"""
+Benchmark suite: simulations, the checker's possible solutions, and every repository backend (add, get,
+get_all, stats, backup) on synthetic histories of each requested size. Runs offline in a temporary
+directory. Results are json, keyed by benchmark name and parameters so runs can be compared.
+
+    python -m benchmarks.suite [--games 1000,10000] [--repeat 3] [--only repo.] [--out run.json] [--compare base.json]
+"""
+from benchmarks.generate import synthetic_words, synthetic_equations, synthetic_games, fill
+from wordle import WordleCtrl, WordleGame, WordleSimulation
+from feedback import FeedbackMatrix
+from nerdle import NerdleCtrl, NerdleGame, NerdleSimulation
+from repo import Repository, RepositoryDb, RepositoryBin
+from wordlist import write_table
+from wordtable import word_result
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import numpy as np
+
+
+REPOSITORIES = {"csv": (Repository, "games.csv"), "db": (RepositoryDb, "games.db"), "bin": (RepositoryBin, "games.bin")}
+
+
+class Suite:
+    def __init__(self, directory: str, repeat: int, only: str | None = None):
+        self.directory = directory
+        self.repeat = repeat
+        self.only = only
+        self.results = []
+
+    def measure(self, name: str, params: dict, ops: int, run, setup=None) -> None:
+        """Runs setup then run `repeat` times, recording the median and best time of run for ops operations."""
+        if self.only and not name.startswith(self.only):
+            return
+        times = []
+        for _ in range(self.repeat):
+            state = setup() if setup else None
+            start = time.perf_counter()
+            run(state)
+            times.append(time.perf_counter() - start)
+        median = statistics.median(times)
+        self.results.append({"name": name, "params": params, "ops": ops, "median_s": median, "min_s": min(times),
+                             "ops_per_s": ops / median if median else None})
+        print(f"{name:28} {json.dumps(params):32} {median * 1000:10.2f} ms {ops / median if median else 0:14.0f} ops/s", file=sys.stderr)
+
+    def path(self, *parts) -> str:
+        return os.path.join(self.directory, *parts)
+
+    def simulations(self, words: list[str], equations: list[str], ops: int = 20000):
+        rng = random.Random(1)
+        pairs = [(rng.choice(words), rng.choice(words)) for _ in range(ops)]
+        self.measure("simulation.wordle", {}, ops, lambda _: [WordleSimulation(s).result(g) for g, s in pairs])
+        # the same results looked up in a feedback matrix, built beforehand on a part of the word list
+        matrix_words = sorted(set(words[:2000]))
+        matrix = FeedbackMatrix.load(matrix_words, self.path("cache"), workers=1)
+        matrix_pairs = [(rng.choice(matrix_words), rng.choice(matrix_words)) for _ in range(ops)]
+        self.measure("simulation.wordle.matrix", {}, ops, lambda _: [matrix.result(g, s) for g, s in matrix_pairs])
+        pairs = [(rng.choice(equations), rng.choice(equations)) for _ in range(ops)]
+        self.measure("simulation.nerdle", {}, ops, lambda _: [NerdleSimulation(s).result(g) for g, s in pairs])
+
+        for name, simulation_class, pool in (("wordle", WordleSimulation, words), ("nerdle", NerdleSimulation, equations)):
+            guesses = [rng.choice(pool) for _ in range(ops)]
+            simulation = simulation_class(guesses[0])
+            self.measure(f"simulation.{name}.many", {}, ops, lambda _: simulation.result_many(guesses))
+            self.measure(f"simulation.{name}.many_solutions", {}, ops,
+                         lambda _: simulation_class.result_many_solutions(guesses[0], guesses))
+
+    def solutions(self, words: list[str], equations: list[str], games: int = 200):
+        for name, ctrl, pool in (("solutions.wordle", self.wordle_ctrl, words), ("solutions.nerdle", self.nerdle_ctrl, equations)):
+            rng = random.Random(2)
+            plays = []
+            for _ in range(games):
+                solution = rng.choice(pool)
+                plays.append([(g, word_result(g, solution)) for g in rng.sample(pool, 2)])
+
+            def run(_, ctrl=ctrl, plays=plays):
+                for play in plays:
+                    ctrl.start()
+                    for guess, result in play:
+                        ctrl.add_try(guess, result)
+                        ctrl.get_possible_solutions()
+            self.measure(name, {"words": len(pool)}, games * 2, run)
+
+    def repositories(self, words: list[str], sizes: list[int], ops: int = 1000):
+        for backend, (repo_class, filename) in REPOSITORIES.items():
+            new_games = list(synthetic_games(WordleGame, ops, words, seed=3))
+
+            def fresh(repo_class=repo_class, filename=filename):
+                self.remove(self.path("fresh", filename))
+                os.makedirs(self.path("fresh"), exist_ok=True)
+                return repo_class(self.path("fresh", filename), WordleGame)
+            self.measure(f"repo.{backend}.add", {}, ops, lambda repo: [repo.add(g) for g in new_games], fresh)
+
+            for size in sizes:
+                params = {"games": size}
+                os.makedirs(self.path(str(size)), exist_ok=True)
+                path = self.path(str(size), filename)
+                if not os.path.exists(path):
+                    fill(repo_class(path, WordleGame), synthetic_games(WordleGame, size, words, seed=size))
+                repo = repo_class(path, WordleGame)
+                ctrl = NerdleCtrl(repo)  # only its repository is used, so no word list is needed
+
+                rng = random.Random(4)
+                first = datetime.date(2000, 1, 1)
+                dates = [first + datetime.timedelta(days=rng.randrange(size)) for _ in range(ops)]
+                self.measure(f"repo.{backend}.get", params, ops, lambda _: [repo.get(d) for d in dates])
+                self.measure(f"repo.{backend}.get_last", params, ops, lambda _: [repo.get(None) for _ in range(ops)])
+                self.measure(f"repo.{backend}.get_all", params, size, lambda _: repo.get_all())
+
+                def cold(repo=repo):
+                    if getattr(repo, "stats_filename", None):
+                        self.remove(repo.stats_filename)
+                self.measure(f"repo.{backend}.stats_cold", params, size, lambda _: ctrl.get_summary(), cold)
+                self.measure(f"repo.{backend}.stats", params, size, lambda _: ctrl.get_summary())
+                self.measure(f"repo.{backend}.backup", params, 1,
+                             lambda _: self.remove(repo.backup(datetime.datetime(2000, 1, 1))))
+
+    @staticmethod
+    def remove(path: str) -> None:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def run(self, sizes: list[int], word_count: int) -> dict:
+        words = synthetic_words(word_count)
+        equations = synthetic_equations()
+        with open(self.path("words.txt"), "w") as f:
+            f.write("\n".join(words) + "\n")
+        write_table(self.path("equations.bin"), equations)
+
+        self.wordle_ctrl = WordleCtrl(RepositoryDb(":memory:", WordleGame), self.path("words.txt"), self.path("words.bin"))
+        self.nerdle_ctrl = NerdleCtrl(RepositoryDb(":memory:", NerdleGame), self.path("equations.bin"))
+
+        self.simulations(words, equations)
+        self.solutions(words, equations)
+        self.repositories(words, sizes)
+        return {
+            "meta": {"time": datetime.datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                     "numpy": np.__version__, "platform": platform.platform(), "cpus": os.cpu_count(),
+                     "words": len(words), "equations": len(equations), "repeat": self.repeat},
+            "results": self.results,
+        }
+
+
+def compare(report: dict, baseline: dict) -> str:
+    """Median time of every benchmark relative to the baseline run (below 1 is faster)."""
+    base = {(r["name"], json.dumps(r["params"], sort_keys=True)): r for r in baseline["results"]}
+    lines = [f"{'benchmark':28} {'params':32} {'base ms':>10} {'now ms':>10} {'ratio':>7}"]
+    for r in report["results"]:
+        key = (r["name"], json.dumps(r["params"], sort_keys=True))
+        if key in base:
+            old, new = base[key]["median_s"], r["median_s"]
+            lines.append(f"{key[0]:28} {key[1]:32} {old * 1000:10.2f} {new * 1000:10.2f} {new / old if old else 0:7.2f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite on synthetic data")
+    parser.add_argument("--games", default="1000,10000", help="comma separated history sizes, up to 1000000")
+    parser.add_argument("--words", type=int, default=12000, help="size of the synthetic word list")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", default=None, help="only run benchmarks whose name starts with this")
+    parser.add_argument("--out", default=None, help="write the json report to this file instead of stdout")
+    parser.add_argument("--compare", default=None, help="json report of a previous run to compare with")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        suite = Suite(directory, args.repeat, args.only)
+        report = suite.run([int(n) for n in args.games.split(",")], args.words)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report))
+    if args.compare:
+        with open(args.compare) as f:
+            print(compare(report, json.load(f)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+from utils import *
+from wordtable import WordTable
+from wordindex import WordIndex
+import string
+import threading
+import numpy as np
+
+
+def try_constraints(word_tried: str, result: str):
+    """
+    Gray characters, yellow characters per position and green character per position (1-based)
+    that a single try with its result contributes to a runner.
+    """
+    grays = ""
+    yellows = {i: "" for i in range(1, len(word_tried)+1)}
+    greens: dict[int, str|None] = {i: None for i in range(1, len(word_tried)+1)}
+
+    i = 0
+    for c, t in zip(word_tried, result):
+        i += 1
+
+        match t:
+            case ResultKey.GRAY:
+                if word_tried.count(c) == 1:
+                    grays += c
+                else:
+                    found_gray = False
+                    for c2, t2 in zip(word_tried, result):
+                        if c2 == c:
+                            if t2 == ResultKey.GRAY:
+                                found_gray = True
+                            elif t2 in (ResultKey.YELLOW, ResultKey.GREEN):
+                                yellows[i] += c
+                                found_gray = False
+                                break
+                    if found_gray:
+                        grays += c
+
+            case ResultKey.YELLOW:
+                yellows[i] += c
+            case ResultKey.GREEN:
+                greens[i] = c
+            case _:
+                raise Exception("Invalid result character found.")
+
+    return grays, yellows, greens
+
+
+class CandidateFilter:
+    """
+    Word list with a positional inverted index, so the runners' gray/yellow/green data can be checked against
+    all words (or the current candidates) by intersecting posting lists.
+    The filter is read-only after construction and can be shared between games.
+    """
+    def __init__(self, words, alphabet: str = string.ascii_lowercase):
+        if not (isinstance(words, WordTable) and words.alphabet == alphabet):
+            words = WordTable(words, alphabet)
+        self.words = words
+        self.alphabet = alphabet
+        self._index = None
+        self._index_lock = threading.Lock()
+
+    @property
+    def index(self) -> WordIndex:
+        """Positional inverted index of the words, built on first use (once, even if games narrow concurrently)."""
+        with self._index_lock:
+            if self._index is None:
+                self._index = WordIndex(self.words)
+            return self._index
+
+    def survivors(self, grays: str, yellows: dict[int, str], greens: dict[int, str|None], indices: np.ndarray|None = None) -> np.ndarray:
+        """
+        Sorted indices of the words compatible with the runner data (positions are 1-based), among the given
+        (sorted) indices if any. Answered from the index, so it costs about the size of the smallest term or of indices.
+        """
+        return self.index.search(
+            greens={pos-1: c for pos, c in greens.items() if c is not None},
+            present={c: 1 for c in "".join(yellows.values())},
+            absent=grays,
+            not_at={pos-1: chars for pos, chars in yellows.items() if chars},
+            within=indices)
+
+    def filter(self, grays: str, yellows: dict[int, str], greens: dict[int, str|None]) -> list[str]:
+        return self.words.select(self.survivors(grays, yellows, greens))
+
+
+class CandidateSet:
+    """
+    Surviving word indices of one game. Each try only narrows the current survivors, and the sets
+    of previous tries are kept so the last one can be undone without filtering again.
+    """
+    def __init__(self, word_filter: CandidateFilter):
+        self.word_filter = word_filter
+        self.stack = [np.arange(len(word_filter.words))]
+
+    @property
+    def indices(self) -> np.ndarray:
+        return self.stack[-1]
+
+    def narrow(self, word_tried: str, result: str) -> None:
+        grays, yellows, greens = try_constraints(word_tried.lower(), result)
+        self.stack.append(self.word_filter.survivors(grays, yellows, greens, self.indices))
+
+    def pop(self) -> None:
+        if len(self.stack) == 1:
+            raise Exception("No try to undo.")
+        self.stack.pop()
+
+    def words(self, limit: int|None = None) -> list[str]:
+        return self.word_filter.words.select(self.indices[:limit])
+
+    def __len__(self):
+        return len(self.indices)
@@ -1,6 +1,122 @@
 from utils import *
 from abc import ABC, abstractmethod
+from array import array
 import datetime
+import instrument
+import json
+import os
+
+
+def game_score(game) -> int:
+    """Number of tries, or one more than the tries if the game was not guessed."""
+    if not game.codes:
+        raise ValueError("A game needs at least one try.")
+    score = len(game.codes)
+    if game.codes[-1] != 3 ** len(game.solution) - 1:  # all green
+        score += 1
+    return score
+
+
+class GameStats:
+    """
+    Score histogram and streaks of games added in date order, each game updating them in O(1).
+    A snapshot is saved as a small json file plus an append-only file of the scores (one byte per game),
+    so adding a game to a saved snapshot does not rewrite the history.
+    """
+    FIELDS = ("games", "longest", "run")
+    DATE_FIELDS = ("longest_start", "longest_end", "run_start", "last_date")
+
+    def __init__(self):
+        self.games = 0
+        self.histogram: dict[int, int] = {}
+        self.scores = array('b')
+
+        self.longest = 0
+        self.longest_start = self.longest_end = None
+        self.run = 0
+        self.run_start = self.last_date = None
+
+    def add(self, game):
+        score = game_score(game)
+        self.games += 1
+        self.histogram[score] = self.histogram.get(score, 0) + 1
+        self.scores.append(score)
+
+        if self.last_date is not None and (game.date - self.last_date).days == 1:
+            self.run += 1
+        elif self.last_date is None or game.date != self.last_date:
+            self.run = 1
+            self.run_start = game.date
+        self.last_date = game.date
+
+        if self.run > self.longest:
+            self.longest = self.run
+            self.longest_start, self.longest_end = self.run_start, game.date
+
+    def longest_streak(self):
+        if self.games == 0:
+            return None
+        return self.longest, self.longest_start, self.longest_end
+
+    def current_streak(self, today: datetime.date|None = None):
+        today = today or datetime.date.today()
+        if self.last_date not in (today - datetime.timedelta(days=1), today):
+            return None
+        return self.run
+
+    def to_dict(self) -> dict:
+        d = {field: getattr(self, field) for field in GameStats.FIELDS}
+        d.update({field: getattr(self, field) and getattr(self, field).isoformat() for field in GameStats.DATE_FIELDS})
+        d["histogram"] = {str(score): n for score, n in self.histogram.items()}
+        return d
+
+    @classmethod
+    def from_dict(cls, d: dict, scores: array):
+        stats = cls()
+        for field in GameStats.FIELDS:
+            setattr(stats, field, d[field])
+        for field in GameStats.DATE_FIELDS:
+            setattr(stats, field, d[field] and datetime.date.fromisoformat(d[field]))
+        stats.histogram = {int(score): n for score, n in d["histogram"].items()}
+        stats.scores = scores
+        return stats
+
+    def save(self, path: str, appended: int|None = None) -> None:
+        """Writes the snapshot; with `appended`, only that many new scores are added to the scores file."""
+        scores_path = path + ".scores"
+        if appended is None:
+            with open(scores_path, 'wb') as f:
+                self.scores.tofile(f)
+        else:
+            with open(scores_path, 'ab') as f:
+                self.scores[len(self.scores)-appended:].tofile(f)
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, with_scores: bool = True):
+        """
+        The saved snapshot, or None if it is missing or unreadable. Without scores only the json is read
+        (the scores file is just checked to have one byte per game), which is enough to add games to it.
+        """
+        try:
+            with open(path, 'r') as f:
+                d = json.load(f)
+            scores = array('b')
+            if not with_scores:
+                if os.path.getsize(path + ".scores") != d["games"]:
+                    return None
+                return cls.from_dict(d, scores)
+            with open(path + ".scores", 'rb') as f:
+                scores.frombytes(f.read())
+            if len(scores) != d["games"]:
+                return None
+            return cls.from_dict(d, scores)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
 
 
 class Controller(ABC):
@@ -31,9 +147,25 @@ class Controller(ABC):
         if self.runner is None:
             raise Exception("Game not started.")
         self.runner.add_try(tried, result)
+
+    def pop_try(self):
+        if self.runner is None:
+            raise Exception("Game not started.")
+        return self.runner.pop_try()
     
     def store(self, game):
+        """Adds the game, and its score to the saved stats without reading the scores already saved."""
+        game_score(game)  # a game that cannot be scored is rejected before anything is written
+        path = getattr(self.repo, "stats_filename", None)
+        stats = self._snapshot(path, with_scores=False)
+        if stats is not None:
+            stats.add(game)
         self.repo.add(game)
+
+        if stats is not None:
+            stats.save(path, appended=1)
+        elif path is not None and os.path.exists(path):
+            os.remove(path)  # stale, rebuilt when the stats are next opened
     
     def get(self, date = None):
         return self.repo.get(date)
@@ -41,64 +173,61 @@ class Controller(ABC):
     def backup(self):
         return self.repo.backup(datetime.datetime.now())
 
+    def _snapshot(self, path: str|None, with_scores: bool = True):
+        """The saved stats if they match the repository (same number of games, same last date), else None."""
+        if path is None:
+            return None
+        stats = GameStats.load(path, with_scores)
+        if stats is None or stats.games != self.repo.count() or stats.last_date != self.repo.last_date():
+            return None
+        return stats
+
+    def _aggregate_summary(self) -> GameStats:
+        """Summary from the aggregate queries of the repository, without loading any game."""
+        stats = GameStats()
+        stats.histogram = self.repo.score_distribution()
+        stats.games = sum(stats.histogram.values())
+        stats.scores = array('b', self.repo.scores())
+        if stats.games:
+            stats.longest, stats.longest_start, stats.longest_end = self.repo.longest_streak()
+            stats.run, stats.run_start, stats.last_date = self.repo.last_streak()
+        return stats
+
+    def get_summary(self) -> GameStats:
+        """
+        Scores and streaks of every stored game, computed by the repository when it supports aggregates,
+        otherwise from the snapshot saved next to the repository.
+        The snapshot is rebuilt in a single pass over the games when it is missing or stale.
+        """
+        if hasattr(self.repo, "score_distribution"):
+            return self._aggregate_summary()
+
+        path = getattr(self.repo, "stats_filename", None)
+        stats = self._snapshot(path)
+        if stats is None:
+            instrument.count("stats.rebuilds")
+            stats = GameStats()
+            for game in self.repo.iter_games():
+                stats.add(game)
+            if path is not None:
+                stats.save(path)
+        return stats
+
     def get_stats(self):
         dates = []
         scores = []
-        games = self.repo.get_all()
 
-        for game in games:
+        for game in self.repo.iter_games():
             dates.append(game.date)
-            score = len(game.results)
-            if set(game.results[-1]) != set([ResultKey.GREEN]):
-                score += 1
-            scores.append(score)
+            scores.append(game_score(game))
         
         return dates, scores
     
     def get_longest_streak(self):
-        games = self.repo.get_all()
-        if len(games) == 0:
-            return None
-        
-        max_streak = 0
-        date1 = date2 = games[0].date
-
-        current_streak = 1
-        for i in range(len(games)-1):
-            game1 = games[i]
-            game2 = games[i+1]
-
-            if (game2.date - game1.date).days == 1:
-                current_streak += 1
-                date2 = game2.date
-            else:
-                date1 = game1.date
-                current_streak = 1
-            
-            if current_streak > max_streak:
-                max_streak = current_streak
-                
-        
-        return max_streak, date1, date2
+        return self.get_summary().longest_streak()
 
     def get_current_streak(self):
-        games = self.repo.get_all()
-        if len(games) == 0:
-            return None
-        
-        if games[-1].date not in (datetime.date.today() - datetime.timedelta(days=1), datetime.date.today()):
-            return None
-
-        current_streak = 1
-        for i in range(len(games)-1, 0, -1):
-            game1 = games[i]
-            game2 = games[i-1]
-
-            if (game1.date - game2.date).days == 1:
-                current_streak += 1
-            else: break
-        
-        return current_streak
+        return self.get_summary().current_streak()
 
     @abstractmethod
     def get_possible_solutions(self):
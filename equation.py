@@ -0,0 +1,253 @@
+from utils import *
+from wordlist import read_table, write_table, WordListError
+from fractions import Fraction
+import functools
+import os
+import numpy as np
+
+
+NERDLE_LENGTH = 8
+DIGITS = frozenset("0123456789")
+VECTOR_MAX_LENGTH = 10  # longer equations could overflow int64 numerators/denominators
+_SHAPE = str.maketrans("0123456789", "dddddddddd")
+
+
+def _numbers(length: int):
+    """Every number of exactly this many digits, without leading zeros."""
+    if length == 1:
+        return range(0, 10)
+    return range(10 ** (length - 1), 10 ** length)
+
+
+def _divide(a, b):
+    if isinstance(a, int) and a % b == 0:
+        return a // b
+    return Fraction(a, b)
+
+
+class _Enumerator:
+    """
+    Builds expressions bottom-up by length (term = number (*|/ number)*, expression = term (+|- term)*),
+    carrying each value along so nothing is parsed or evaluated twice. Shorter lengths are memoized.
+    """
+    def __init__(self, max_length: int):
+        self.max_length = max_length
+        self._terms = {}
+        self._expressions = {}
+
+    def terms(self, length: int):
+        if length in self._terms:
+            return self._terms[length]
+        if length < self.max_length:
+            self._terms[length] = list(self._iter_terms(length))
+            return self._terms[length]
+        return self._iter_terms(length)
+
+    def expressions(self, length: int):
+        if length in self._expressions:
+            return self._expressions[length]
+        if length < self.max_length:
+            self._expressions[length] = list(self._iter_expressions(length))
+            return self._expressions[length]
+        return self._iter_expressions(length)
+
+    def _iter_terms(self, length: int):
+        yield from ((str(n), n) for n in _numbers(length))
+        for left in range(1, length - 1):
+            right = length - left - 1
+            for text, value in self.terms(left):
+                for n in _numbers(right):
+                    yield f"{text}*{n}", value * n
+                    if n != 0:
+                        yield f"{text}/{n}", _divide(value, n)
+
+    def _iter_expressions(self, length: int):
+        yield from self.terms(length)
+        for left in range(1, length - 1):
+            right_terms = self.terms(length - left - 1)
+            for text, value in self.expressions(left):
+                for right, right_value in right_terms:
+                    yield f"{text}+{right}", value + right_value
+                    yield f"{text}-{right}", value - right_value
+
+
+def generate_equations(length: int = NERDLE_LENGTH) -> list[str]:
+    """
+    Every valid equation of the given length: an expression with at least one operator, '=', and its value,
+    which has to be a non-negative integer. Numbers never have leading zeros.
+    """
+    enumerator = _Enumerator(length - 2)
+    equations = []
+    for rhs_length in range(1, length - 2):
+        lhs_length = length - rhs_length - 1
+        low, high = (0 if rhs_length == 1 else 10 ** (rhs_length - 1)), 10 ** rhs_length
+        for text, value in enumerator.expressions(lhs_length):
+            if low <= value < high and value == int(value) and not text.isdigit():
+                equations.append(f"{text}={int(value)}")
+    return sorted(equations)
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def evaluate(expression: str) -> int|Fraction|None:
+    """
+    Exact value of an expression of the Nerdle grammar (numbers without leading zeros joined by + - * /,
+    usual precedence), or None if it is malformed or divides by zero.
+    """
+    n = len(expression)
+    total, term = 0, 0
+    add_op, mul_op = "+", None
+    i = 0
+    while True:
+        j = i
+        while j < n and expression[j] in DIGITS:
+            j += 1
+        if j == i or (expression[i] == "0" and j - i > 1):
+            return None
+        value = int(expression[i:j])
+
+        if mul_op is None:
+            term = value
+        elif mul_op == "*":
+            term = term * value
+        elif value == 0:
+            return None
+        else:
+            term = _divide(term, value)
+
+        if j == n:
+            break
+        op = expression[j]
+        if op in "*/":
+            mul_op = op
+        elif op in "+-":
+            total = total + term if add_op == "+" else total - term
+            add_op, mul_op = op, None
+        else:
+            return None
+        i = j + 1
+
+    return total + term if add_op == "+" else total - term
+
+
+def is_valid_equation(equation: str, length: int = NERDLE_LENGTH) -> bool:
+    if len(equation) != length or equation.count("=") != 1:
+        return False
+    lhs, rhs = equation.split("=")
+    left = evaluate(lhs)
+    return left is not None and left == evaluate(rhs)
+
+
+@functools.lru_cache(maxsize=None)
+def _side_plan(shape: str):
+    """Digit slices and operators of one side's shape ('dd*d+d'), or None if it is malformed."""
+    plan = []
+    i = 0
+    while i < len(shape):
+        j = i
+        while j < len(shape) and shape[j] == "d":
+            j += 1
+        if j == i:
+            return None
+        plan.append((i, j))
+        if j == len(shape):
+            return plan
+        if shape[j] not in "+-*/":
+            return None
+        plan.append(shape[j])
+        i = j + 1
+    return None
+
+
+def _evaluate_columns(digits: np.ndarray, plan: list) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Exact values (numerators, denominators) of many expressions sharing a plan, and which are valid."""
+    ones = np.ones(len(digits), dtype=np.int64)
+    ok = ones.astype(bool)
+    total_n, total_d = np.zeros_like(ones), ones
+    term_n, term_d = None, None
+    add_op, mul_op = "+", None
+
+    for token in plan + ["+"]:
+        if isinstance(token, tuple):
+            start, end = token
+            if end - start > 1:
+                ok &= digits[:, start] != 0
+            value = digits[:, start:end] @ (10 ** np.arange(end - start - 1, -1, -1, dtype=np.int64))
+            if mul_op is None:
+                term_n, term_d = value, ones
+            elif mul_op == "*":
+                term_n = term_n * value
+            else:
+                ok &= value != 0
+                term_d = term_d * np.where(value == 0, 1, value)
+        elif token in "*/":
+            mul_op = token
+        else:
+            sign = 1 if add_op == "+" else -1
+            total_n, total_d = total_n * term_d + sign * term_n * total_d, total_d * term_d
+            add_op, mul_op = token, None
+
+    return total_n, total_d, ok
+
+
+def validate_many(equations, length: int = NERDLE_LENGTH) -> list[bool]:
+    """
+    is_valid_equation for a batch. Equations are grouped by shape (where the digits and operators are),
+    each shape is parsed once, and every group is evaluated column-wise with exact integer fractions.
+    """
+    equations = list(equations)
+    if length > VECTOR_MAX_LENGTH:
+        return [is_valid_equation(equation, length) for equation in equations]
+
+    lengths = np.fromiter(map(len, equations), dtype=np.int64, count=len(equations))
+    positions = np.flatnonzero(lengths == length)
+    joined = "".join(equations) if len(positions) == len(equations) else "".join(equations[i] for i in positions)
+    if not joined.isascii():
+        positions = np.array([i for i in positions if equations[i].isascii()], dtype=np.int64)
+        joined = "".join(equations[i] for i in positions)
+    valid = np.zeros(len(equations), dtype=bool)
+    if len(positions) == 0:
+        return valid.tolist()
+    chars = np.frombuffer(joined.encode(), dtype=np.uint8).reshape(-1, length)
+    known = np.zeros(256, dtype=bool)
+    known[np.frombuffer(b"0123456789+-*/=", dtype=np.uint8)] = True
+    rows = known[chars].all(axis=1)  # anything else (such as the 'd' of the shapes) makes the equation invalid
+    if not rows.all():
+        chars, positions = chars[rows], positions[rows]
+        if len(positions) == 0:
+            return valid.tolist()
+    is_digit = (chars >= ord("0")) & (chars <= ord("9"))
+    shapes = np.where(is_digit, ord("d"), chars).astype(np.uint8)
+    keys, inverse = np.unique(shapes.view(f"V{length}").ravel(), return_inverse=True)
+    order = np.argsort(inverse, kind="stable")
+    bounds = np.searchsorted(inverse[order], np.arange(len(keys) + 1))
+    digits = chars.astype(np.int64) - ord("0")
+
+    matches = np.zeros(len(positions), dtype=bool)
+    for group, key in enumerate(keys):
+        shape = key.tobytes().decode()
+        if shape.count("=") != 1:
+            continue
+        lhs, rhs = shape.split("=")
+        lhs_plan, rhs_plan = _side_plan(lhs), _side_plan(rhs)
+        if lhs_plan is None or rhs_plan is None:
+            continue
+
+        rows = order[bounds[group]:bounds[group + 1]]
+        left_n, left_d, left_ok = _evaluate_columns(digits[rows, :len(lhs)], lhs_plan)
+        right_n, right_d, right_ok = _evaluate_columns(digits[rows, len(lhs)+1:], rhs_plan)
+        matches[rows] = left_ok & right_ok & (left_n * right_d == right_n * left_d)
+
+    valid[positions] = matches
+    return valid.tolist()
+
+
+def load_equations(length: int = NERDLE_LENGTH, path: str|None = None) -> list[str]:
+    """Equations from their cached table, generated and cached on first use."""
+    if path is None:
+        path = os.path.join(CACHE_DIR, f"equations_{length}.bin")
+    try:
+        return read_table(path)
+    except (OSError, WordListError):
+        equations = generate_equations(length)
+        write_table(path, equations)
+        return equations
@@ -0,0 +1,148 @@
+"""
+Plays a strategy against every answer and reports how many tries it needed.
+
+    python evaluate.py [--opener salet] [--workers 8] [--limit 1000]
+"""
+from wordle import WordleRunner, WordleSimulation
+from wordlist import WordListStore
+from feedback import FeedbackMatrix
+from candidates import CandidateFilter, CandidateSet
+from solver import Solver
+from wordtable import WordTable
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import os
+import time
+import numpy as np
+
+
+MAX_TRIES = 6
+
+
+class SolverStrategy:
+    """Plays the opener (if any), then the best guess by expected information, remembering its choices."""
+    def __init__(self, opener: str|None = None):
+        self.opener = opener.lower() if opener else None
+        self._solver = None
+        self._choices = {}
+
+    def __call__(self, runner: WordleRunner, candidates: CandidateSet, feedback: FeedbackMatrix) -> str:
+        if not runner.tries and self.opener:
+            return self.opener
+
+        key = tuple(zip(runner.tries, runner.results))
+        if key not in self._choices:
+            if self._solver is None or self._solver.feedback is not feedback:
+                self._solver = Solver(feedback, workers=1)
+            self._choices[key] = self._solver.rank(candidates.indices, 1)[0][0]
+        return self._choices[key]
+
+    def __getstate__(self):
+        return {"opener": self.opener, "_solver": None, "_choices": {}}
+
+
+def play(strategy, solution: str, word_filter: CandidateFilter, feedback: FeedbackMatrix) -> int|None:
+    """Number of tries the strategy needed to find the solution, None if it failed."""
+    runner = WordleRunner()
+    candidates = CandidateSet(word_filter)
+    simulation = WordleSimulation(solution)
+
+    for tries in range(1, MAX_TRIES + 1):
+        guess = strategy(runner, candidates, feedback)
+        result = simulation.result(guess)
+        if guess == solution:
+            return tries
+        runner.add_try(guess, result)
+        candidates.narrow(guess, result)
+    return None
+
+
+class EvaluationReport:
+    def __init__(self, distribution: dict[int, int], failures: list[str], seconds: float):
+        self.distribution = distribution
+        self.failures = failures
+        self.seconds = seconds
+
+    @property
+    def games(self) -> int:
+        return sum(self.distribution.values()) + len(self.failures)
+
+    @property
+    def average(self) -> float:
+        solved = sum(self.distribution.values())
+        return sum(t * n for t, n in self.distribution.items()) / solved if solved else 0.0
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        s = f"{self.games} games in {self.seconds:.2f}s ({self.games_per_second:.1f} games/sec)"
+        for tries in sorted(self.distribution):
+            s += f"\nguessed in {tries} tries: {self.distribution[tries]}"
+        s += f"\nnot guessed: {len(self.failures)}"
+        s += f"\naverage tries: {self.average:.3f}"
+        return s
+
+
+_worker = None
+
+def _set_worker(strategy, words: list[str], feedback: FeedbackMatrix):
+    global _worker
+    _worker = (strategy, CandidateFilter(words), feedback)
+
+def _init_worker(strategy, words: list[str], feedback_path: str):
+    words = WordTable(words)
+    _set_worker(strategy, words, FeedbackMatrix(words, np.load(feedback_path, mmap_mode='r'), feedback_path))
+
+def _play_chunk(solutions: list[str]):
+    strategy, word_filter, feedback = _worker
+    distribution, failures = {}, []
+    for solution in solutions:
+        tries = play(strategy, solution, word_filter, feedback)
+        if tries is None:
+            failures.append(solution)
+        else:
+            distribution[tries] = distribution.get(tries, 0) + 1
+    return distribution, failures
+
+
+def evaluate(strategy, words: list[str], answers: list[str]|None = None, feedback: FeedbackMatrix|None = None,
+             workers: int|None = None, chunk_size: int = 64) -> EvaluationReport:
+    """
+    Plays the strategy against every answer (all words by default). A strategy is a picklable callable
+    taking the runner, the CandidateSet and the FeedbackMatrix of the game and returning the next guess.
+    """
+    if feedback is None:
+        feedback = FeedbackMatrix.load(words)
+    answers = list(words if answers is None else answers)
+    chunks = [answers[i:i + chunk_size] for i in range(0, len(answers), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    if workers == 1 or feedback.path is None:
+        _set_worker(strategy, feedback.words, feedback)
+        results = [_play_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(strategy, words, feedback.path)) as pool:
+            results = list(pool.map(_play_chunk, chunks))
+    seconds = time.perf_counter() - start
+
+    distribution, failures = {}, []
+    for chunk_distribution, chunk_failures in results:
+        for tries, n in chunk_distribution.items():
+            distribution[tries] = distribution.get(tries, 0) + n
+        failures += chunk_failures
+    return EvaluationReport(distribution, failures, seconds)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Evaluate a Wordle strategy against every answer")
+    parser.add_argument("--opener", default=None, help="first guess of every game")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--limit", type=int, default=None, help="only play the first N answers")
+    args = parser.parse_args()
+
+    words = WordListStore().load()
+    report = evaluate(SolverStrategy(args.opener), words, words[:args.limit], workers=args.workers)
+    print(report)
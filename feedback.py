@@ -0,0 +1,280 @@
+from utils import *
+from wordtable import WordTable, pattern_dtype, pattern_codes, guesses_codes, solutions_codes
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import functools
+import hashlib
+import instrument
+import os
+import string
+import numpy as np
+
+
+RESULT_DIGITS = {ResultKey.GRAY: 0, ResultKey.YELLOW: 1, ResultKey.GREEN: 2}
+DIGIT_RESULTS = (ResultKey.GRAY, ResultKey.YELLOW, ResultKey.GREEN)
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def result_to_code(result: str) -> int:
+    """'G_Y__' -> base-3 code, first position being the least significant digit."""
+    code = 0
+    for c in reversed(result):
+        code = code * 3 + RESULT_DIGITS[c]
+    return code
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def code_to_result(code: int, length: int) -> str:
+    res = []
+    for _ in range(length):
+        code, digit = divmod(int(code), 3)
+        res.append(DIGIT_RESULTS[digit])
+    return "".join(res)
+
+
+def encode_words(words) -> np.ndarray:
+    """Encodes equally long ascii words as a (n, length) uint8 array of character codes."""
+    if isinstance(words, WordTable):
+        return words.ascii()
+    words = list(words)
+    if len(words) == 0:
+        return np.zeros((0, 0), dtype=np.uint8)
+    return np.frombuffer("".join(words).encode("ascii"), dtype=np.uint8).reshape(len(words), -1)
+
+
+def encode_many(words, length: int, alphabet: str, lower: bool = False) -> np.ndarray:
+    """
+    Encodes words like encode_words, after checking that they all have the given length
+    and only characters of the alphabet (once lowercased, if asked).
+    """
+    if isinstance(words, WordTable):
+        if len(words) and words.length != length:
+            raise ValueError(f"Invalid length. Must be {length} characters long.")
+        return words.ascii()
+
+    words = [words] if isinstance(words, str) else list(words)
+    # one separator after every word: they all have the right length only if the separators line up
+    text = "\n".join(words) + "\n"
+    if len(text) != (length + 1) * len(words):
+        raise ValueError(f"Invalid length. Must be {length} characters long.")
+    data = (text.lower() if lower else text).encode("ascii", errors="replace")
+    if data[length::length + 1] != b"\n" * len(words):
+        raise ValueError(f"Invalid length. Must be {length} characters long.")
+    if data.translate(None, alphabet.encode("ascii")) != b"\n" * len(words):  # what is left out of the alphabet
+        raise ValueError("Invalid characters.")
+    return np.frombuffer(data, dtype=np.uint8).reshape(len(words), length + 1)[:, :length]
+
+
+def candidate_columns(data: np.ndarray, start: int, stop: int, candidates: np.ndarray) -> np.ndarray:
+    """Rows start..stop of a matrix of codes, restricted to the candidate columns."""
+    if len(candidates) == data.shape[1]:  # every word is still a candidate, no need to gather columns
+        return data[start:stop]
+    return data[start:stop][:, candidates]
+
+
+_fill_words = None
+
+def _init_fill(encoded):
+    global _fill_words
+    _fill_words = encoded
+
+def _fill_rows(path: str, start: int, stop: int) -> None:
+    matrix = np.load(path, mmap_mode='r+')
+    matrix[start:stop] = pattern_codes(_fill_words[start:stop], _fill_words)
+    matrix.flush()
+
+
+class FeedbackMatrix:
+    """
+    Every guess x solution pattern code for a word list, kept in a memory-mapped .npy file
+    named after a hash of the list so it's computed only once per list. Words are looked up in their WordTable.
+    """
+    BLOCK_ROWS = 64
+
+    def __init__(self, words, data: np.ndarray, path: str|None = None):
+        self.words = words if isinstance(words, WordTable) else WordTable(words)
+        self.path = path
+        self.data = data
+        self.length = self.words.length
+
+    @staticmethod
+    def key(words) -> str:
+        return hashlib.sha1("\n".join(words).encode()).hexdigest()
+
+    @staticmethod
+    def cache_path(words, cache_dir: str = CACHE_DIR) -> str:
+        return os.path.join(cache_dir, f"feedback_{FeedbackMatrix.key(words)[:16]}.npy")
+
+    @classmethod
+    def load(cls, words, cache_dir: str = CACHE_DIR, workers: int|None = None):
+        words = words if isinstance(words, WordTable) else WordTable(words)
+        path = FeedbackMatrix.cache_path(words, cache_dir)
+        if os.path.exists(path):
+            data = np.load(path, mmap_mode='r')
+            if data.shape == (len(words), len(words)):
+                return cls(words, data, path)
+        return cls.build(words, path, workers)
+
+    @classmethod
+    def build(cls, words, path: str, workers: int|None = None):
+        words = words if isinstance(words, WordTable) else WordTable(words)
+        instrument.count("feedback.builds")
+        encoded = encode_words(words)
+        n = len(words)
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp.npy"
+        matrix = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=pattern_dtype(encoded.shape[1]), shape=(n, n))
+        del matrix
+
+        blocks = [(start, min(start + cls.BLOCK_ROWS, n)) for start in range(0, n, cls.BLOCK_ROWS)]
+        if workers == 1 or len(blocks) <= 1:
+            _init_fill(encoded)
+            for start, stop in blocks:
+                _fill_rows(tmp_path, start, stop)
+        else:
+            with ProcessPoolExecutor(workers, initializer=_init_fill, initargs=(encoded,)) as pool:
+                for future in [pool.submit(_fill_rows, tmp_path, start, stop) for start, stop in blocks]:
+                    future.result()
+
+        os.replace(tmp_path, path)
+        return cls(words, np.load(path, mmap_mode='r'), path)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.words
+
+    def pattern(self, guess: str, solution: str) -> int:
+        return int(self.data[self.words.index(guess), self.words.index(solution)])
+
+    def result(self, guess: str, solution: str) -> str:
+        return code_to_result(self.pattern(guess, solution), self.length)
+
+    def row(self, guess: str) -> np.ndarray:
+        """Codes of the guess against every solution, in word list order."""
+        return self.data[self.words.index(guess)]
+
+    def patterns(self, guess_indices, solution_indices) -> np.ndarray:
+        return self.data[np.ix_(np.asarray(guess_indices), np.asarray(solution_indices))]
+
+    def block(self, start: int, stop: int, solution_indices) -> np.ndarray:
+        """Codes of the guesses start..stop against the given solutions."""
+        return candidate_columns(self.data, start, stop, np.asarray(solution_indices, dtype=np.int64))
+
+
+class TiledFeedback:
+    """
+    Pattern codes for a word list too large for a FeedbackMatrix (every Nerdle equation), computed on demand
+    in square tiles of guesses x solutions. The most recently used tiles are kept in memory up to max_bytes.
+    With a spill path, computed tiles are also written to a sparse memory-mapped .npy file, with a map of the
+    tiles already there, so they are read back instead of computed again, here or in a later run.
+    Has the lookup methods of FeedbackMatrix, so a Solver can use it (in process).
+    """
+    TILE = 512
+    MAX_BYTES = 64 << 20
+    path = None  # no complete matrix file that a Solver's workers could map
+
+    def __init__(self, words, spill_path: str|None = None, tile: int|None = None, max_bytes: int|None = None,
+                 alphabet: str = string.ascii_lowercase):
+        self.words = words if isinstance(words, WordTable) else WordTable(words, alphabet)
+        self.length = self.words.length
+        self.tile = tile or TiledFeedback.TILE
+        self.max_bytes = TiledFeedback.MAX_BYTES if max_bytes is None else max_bytes
+        self.dtype = pattern_dtype(self.length)
+        self._codes = self.words.codes
+        self._tiles = OrderedDict()
+        self._bytes = 0
+
+        self.spill_path = spill_path
+        self._spill = self._done = None
+        if spill_path is not None:
+            self._open_spill(spill_path)
+
+    @staticmethod
+    def cache_path(words, cache_dir: str = CACHE_DIR) -> str:
+        return os.path.join(cache_dir, f"tiles_{FeedbackMatrix.key(words)[:16]}.npy")
+
+    def _open_spill(self, path: str) -> None:
+        n = len(self.words)
+        tiles = -(-n // self.tile)
+        # cells do not depend on the tile size, the map of computed tiles does
+        done_path = f"{os.path.splitext(path)[0]}.tiles{self.tile}.npy"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        spill = np.load(path, mmap_mode='r+') if os.path.exists(path) else None
+        if spill is None or spill.shape != (n, n) or spill.dtype != self.dtype:
+            spill = np.lib.format.open_memmap(path, mode='w+', dtype=self.dtype, shape=(n, n))
+            if os.path.exists(done_path):
+                os.remove(done_path)
+        done = np.load(done_path, mmap_mode='r+') if os.path.exists(done_path) else None
+        if done is None or done.shape != (tiles, tiles):
+            done = np.lib.format.open_memmap(done_path, mode='w+', dtype=np.bool_, shape=(tiles, tiles))
+        self._spill, self._done = spill, done
+
+    def _tile(self, ti: int, tj: int) -> np.ndarray:
+        key = (ti, tj)
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles.move_to_end(key)
+            return tile
+
+        rows = slice(ti * self.tile, (ti + 1) * self.tile)
+        columns = slice(tj * self.tile, (tj + 1) * self.tile)
+        if self._done is not None and self._done[ti, tj]:
+            tile = np.array(self._spill[rows, columns])
+        else:
+            instrument.count("feedback.tiles")
+            tile = pattern_codes(self._codes[rows], self._codes[columns]).astype(self.dtype)
+            if self._done is not None:
+                self._spill[rows, columns] = tile
+                self._done[ti, tj] = True
+
+        self._tiles[key] = tile
+        self._bytes += tile.nbytes
+        while self._bytes > self.max_bytes and len(self._tiles) > 1:
+            _, evicted = self._tiles.popitem(last=False)
+            self._bytes -= evicted.nbytes
+        return tile
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.words
+
+    def pattern(self, guess: str, solution: str) -> int:
+        i, j = self.words.index(guess), self.words.index(solution)
+        return int(self._tile(i // self.tile, j // self.tile)[i % self.tile, j % self.tile])
+
+    def result(self, guess: str, solution: str) -> str:
+        return code_to_result(self.pattern(guess, solution), self.length)
+
+    def row(self, guess: str) -> np.ndarray:
+        """Codes of the guess against every solution, computed directly: one row is not worth its tiles."""
+        i = self.words.index(guess)
+        return pattern_codes(self._codes[i:i + 1], self._codes)[0].astype(self.dtype)
+
+    def patterns(self, guess_indices, solution_indices) -> np.ndarray:
+        """Codes of the given guesses against the given solutions, gathered tile by tile."""
+        guesses = np.asarray(guess_indices, dtype=np.int64)
+        solutions = np.asarray(solution_indices, dtype=np.int64)
+        out = np.empty((len(guesses), len(solutions)), dtype=self.dtype)
+        guess_tiles, solution_tiles = guesses // self.tile, solutions // self.tile
+        columns = [(tj, np.flatnonzero(solution_tiles == tj)) for tj in np.unique(solution_tiles)]
+        for ti in np.unique(guess_tiles):
+            gi = np.flatnonzero(guess_tiles == ti)
+            for tj, si in columns:
+                tile = self._tile(int(ti), int(tj))
+                out[np.ix_(gi, si)] = tile[np.ix_(guesses[gi] - ti * self.tile, solutions[si] - tj * self.tile)]
+        return out
+
+    def block(self, start: int, stop: int, solution_indices) -> np.ndarray:
+        """Codes of the guesses start..stop against the given solutions."""
+        return self.patterns(np.arange(start, stop), solution_indices)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the cached tiles."""
+        return self._bytes
+
+    def close(self) -> None:
+        """Writes the spilled tiles out."""
+        if self._spill is not None:
+            self._spill.flush()
+            self._done.flush()
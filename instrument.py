@@ -0,0 +1,186 @@
+"""
+Timers and counters around the controllers, runners, simulations and repositories.
+
+Disabled by default, and then nothing is wrapped: the methods listed in TARGETS are only replaced by
+timed versions when instrumentation is enabled, by the WORDLUTILS_INSTRUMENT environment variable
+or the `instrument` key of settings.toml (the variable wins). Accepted values:
+
+    table          summary table on stderr at exit
+    json           json report on stderr at exit
+    <file>.json    json report written to that file at exit
+    off / false    disabled
+"""
+from contextlib import contextmanager
+import atexit
+import functools
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+import tomllib
+
+
+ENV_VAR = "WORDLUTILS_INSTRUMENT"
+
+# (module, class, method) timed when enabled; inherited methods are timed once, on the class defining them
+TARGETS = [
+    ("wordlist", "WordListStore", "load"),
+    ("wordlist", "WordListStore", "refresh"),
+    ("ctrl", "Controller", "store"),
+    ("ctrl", "Controller", "get"),
+    ("ctrl", "Controller", "backup"),
+    ("ctrl", "Controller", "get_summary"),
+    ("wordle", "WordleCtrl", "_load_words"),
+    ("wordle", "WordleCtrl", "start"),
+    ("wordle", "WordleCtrl", "add_try"),
+    ("wordle", "WordleCtrl", "pop_try"),
+    ("wordle", "WordleCtrl", "get_possible_solutions"),
+    ("wordle", "WordleCtrl", "suggest_guesses"),
+    ("wordle", "WordleRunner", "add_try"),
+    ("wordle", "WordleSimulation", "result"),
+    ("nerdle", "NerdleCtrl", "start"),
+    ("nerdle", "NerdleCtrl", "add_try"),
+    ("nerdle", "NerdleCtrl", "pop_try"),
+    ("nerdle", "NerdleCtrl", "get_possible_solutions"),
+    ("nerdle", "NerdleRunner", "add_try"),
+    ("nerdle", "NerdleSimulation", "result"),
+    ("candidates", "CandidateSet", "narrow"),
+    ("feedback", "FeedbackMatrix", "load"),
+    ("solver", "Solver", "rank"),
+] + [("repo", repo, method) for repo in ("Repository", "RepositoryDb", "RepositoryBin")
+     for method in ("add", "add_many", "get", "get_range", "get_all", "count", "backup")]
+
+_lock = threading.Lock()
+_timings: dict[str, list[int]] = {}  # name -> [calls, total ns, max ns, errors]
+_counters: dict[str, int] = {}
+_originals = []
+_report = None
+
+
+def enabled() -> bool:
+    return bool(_originals)
+
+
+def _record(name: str, elapsed: int, failed: bool) -> None:
+    with _lock:
+        timing = _timings.setdefault(name, [0, 0, 0, 0])
+        timing[0] += 1
+        timing[1] += elapsed
+        timing[2] = max(timing[2], elapsed)
+        timing[3] += failed
+
+
+def _timed(name: str, function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter_ns()
+        failed = True
+        try:
+            result = function(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            _record(name, time.perf_counter_ns() - start, failed)
+    return wrapper
+
+
+@contextmanager
+def timer(name: str):
+    """Times a block under the given name when enabled."""
+    if not _originals:
+        yield
+        return
+    start = time.perf_counter_ns()
+    failed = True
+    try:
+        yield
+        failed = False
+    finally:
+        _record(name, time.perf_counter_ns() - start, failed)
+
+
+def count(name: str, n: int = 1) -> None:
+    if _originals:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + n
+
+
+def enable(report: str = "table") -> None:
+    """Wraps every target with a timer and reports at exit ('table', 'json' or a .json path)."""
+    global _report
+    if not _originals:
+        for module_name, class_name, method in TARGETS:
+            cls = getattr(importlib.import_module(module_name), class_name)
+            if method not in cls.__dict__:
+                continue
+            original = cls.__dict__[method]
+            if isinstance(original, (classmethod, staticmethod)):
+                wrapped = type(original)(_timed(f"{class_name}.{method}", original.__func__))
+            else:
+                wrapped = _timed(f"{class_name}.{method}", original)
+            setattr(cls, method, wrapped)
+            _originals.append((cls, method, original))
+        atexit.register(_write_report)
+    _report = report
+
+
+def disable() -> None:
+    """Restores the original methods and forgets what was recorded."""
+    while _originals:
+        cls, method, original = _originals.pop()
+        setattr(cls, method, original)
+    atexit.unregister(_write_report)
+    reset()
+
+
+def reset() -> None:
+    with _lock:
+        _timings.clear()
+        _counters.clear()
+
+
+def configure(settings_path: str = "settings.toml") -> None:
+    """Enables instrumentation if the environment variable or the settings file asks for it."""
+    value = os.environ.get(ENV_VAR)
+    if value is None:
+        try:
+            with open(settings_path, "rb") as f:
+                value = tomllib.load(f).get("instrument")
+        except (OSError, tomllib.TOMLDecodeError):
+            value = None
+
+    if value is True or value in ("1", "true", "on"):
+        value = "table"
+    if value in (None, False, "", "0", "false", "off"):
+        return
+    enable(str(value))
+
+
+def report() -> dict:
+    with _lock:
+        operations = {name: {"calls": calls, "total_ms": total / 1e6, "mean_us": total / calls / 1e3,
+                             "max_us": longest / 1e3, "errors": errors}
+                      for name, (calls, total, longest, errors) in sorted(_timings.items())}
+        return {"operations": operations, "counters": dict(sorted(_counters.items()))}
+
+
+def summary() -> str:
+    data = report()
+    lines = [f"{'operation':40} {'calls':>9} {'total ms':>11} {'mean us':>11} {'max us':>11} {'errors':>7}"]
+    for name, op in sorted(data["operations"].items(), key=lambda item: -item[1]["total_ms"]):
+        lines.append(f"{name:40} {op['calls']:>9} {op['total_ms']:>11.2f} {op['mean_us']:>11.1f} {op['max_us']:>11.1f} {op['errors']:>7}")
+    for name, n in data["counters"].items():
+        lines.append(f"{name:40} {n:>9}")
+    return "\n".join(lines)
+
+
+def _write_report() -> None:
+    if _report == "table":
+        print(summary(), file=sys.stderr)
+    elif _report == "json":
+        print(json.dumps(report()), file=sys.stderr)
+    else:
+        with open(_report, "w") as f:
+            json.dump(report(), f, indent=2)
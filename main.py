@@ -1,8 +1,8 @@
 from wordle import *
 from nerdle import *
-from repo import Repository, RepositoryDb, csv_to_db
+from repo import Repository, RepositoryDb, RepositoryBin, csv_to_db
 from utils import GameType
-import matplotlib.pyplot as plt
+import instrument
 import tomllib
 
 
@@ -23,35 +23,40 @@ class CLI:
             print(f"{CLI.BOLD}exit{CLI.END}")
         else:
             print(f"--- MENU [{self.game.name}]---")
-            if self.game != GameType.NERDLE:
-                print(f"{CLI.BOLD}checker{CLI.END} - start game for checking possibilities")
+            print(f"{CLI.BOLD}checker{CLI.END} - start game for checking possibilities")
             print(f"{CLI.BOLD}save{CLI.END} - save already completed game")
             print(f"{CLI.BOLD}get{CLI.END} - look up a saved game by date")
             print(f"{CLI.BOLD}stats{CLI.END} - get a plot of stats for all games")
             print(f"{CLI.BOLD}backup{CLI.END} - backup saves to timestamped file")
+            if self.game == GameType.WORDLE:
+                print(f"{CLI.BOLD}refresh{CLI.END} - update the list of words")
             print(f"{CLI.BOLD}exit{CLI.END} - quit")
     
-    def checker_menu(self):
-        if self.game is GameType.NERDLE:
-            print("Checker not available for Nerdle.")
-            return
-
-        self.word_ctrl.start()
+    def checker_menu(self, ctrl):
+        ctrl.start()
         while True:
-            print("-- Enter word, EXIT, or leave empty and enter to return possible solutions")
+            print("-- Enter word, SUGGEST, EXIT, or leave empty and enter to return possible solutions")
             word = input()
             match word.lower():
                 case 'exit':
                     return
+                case 'suggest':
+                    if self.game is GameType.NERDLE:
+                        print("Suggestions not available for Nerdle.")
+                        continue
+                    print("-- SUGGESTED GUESSES --")
+                    for guess, bits in ctrl.suggest_guesses():
+                        print(f"{guess.upper()} ({bits:.2f} bits)")
+                    print()
                 case '':
                     print("-- POSSIBLE SOLUTIONS --")
-                    for solution in self.word_ctrl.get_possible_solutions():
+                    for solution in ctrl.get_possible_solutions():
                         print(solution.upper())
                     print()
                 case _:
                     result = input(f"Enter result (gray '{ResultKey.GRAY}', yellow '{ResultKey.YELLOW}', green '{ResultKey.GREEN}'):\n")
                     try:
-                        self.word_ctrl.add_try(word, result)
+                        ctrl.add_try(word, result)
                         print("ADDED TRY\n")
                     except Exception as e:
                         print(e)
@@ -100,15 +105,20 @@ class CLI:
                 simulation = WordleSimulation(winning)
                 results = [simulation.result(word) for word in tries]
                 game = WordleGame(datetime.date.today(), tries, results, winning)
-                self.word_ctrl.store(game)
+                ctrl = self.word_ctrl
             case GameType.NERDLE:
                 simulation = NerdleSimulation(winning)
                 results = [simulation.result(word) for word in tries]
                 game = NerdleGame(datetime.date.today(), tries, results, winning)
-                self.nerd_ctrl.store(game)
+                ctrl = self.nerd_ctrl
             case _:
                 print("No game chosen.") # should never happen
                 return
+        try:
+            ctrl.store(game)
+        except ValueError as e:
+            print(e)
+            return
         print("GAME SAVED")
 
     def get_menu(self, ctrl):
@@ -133,25 +143,27 @@ class CLI:
         print()
 
     def stats_menu(self, ctrl):
-        dates, scores = ctrl.get_stats()
+        import matplotlib.pyplot as plt
+
+        stats = ctrl.get_summary()
+        scores = stats.scores
         overall = {}
 
-        x = ctrl.get_longest_streak()
+        x = stats.longest_streak()
         if x is not None:
             longest_streak, date1, date2 = x
             print(f"Longest streak of played games: {longest_streak} (from {date1} to {date2})")
         
-        current_streak = ctrl.get_current_streak()
+        current_streak = stats.current_streak()
         if current_streak is not None:
             print(f"Current streak: {current_streak}\n")
 
-        for score in sorted(set(scores)):
-            times = scores.count(score)
-            if times == 1:
+        for score in sorted(stats.histogram):
+            count = stats.histogram[score]
+            if count == 1:
                 word = "game"
             else: word = "games"
 
-            count = scores.count(score)
             overall[score] = count
 
             if score == 7:
@@ -164,8 +176,8 @@ class CLI:
         fig.suptitle(f"{self.game.name} STATS")
 
         ax1.plot(scores, color="#1E51C9")
-        if len(scores):
-            ax1.set_yticks(range(max(min(scores)-1, 1), 8))
+        if len(overall):
+            ax1.set_yticks(range(max(min(overall)-1, 1), 8))
         ax1.set_ylabel("Tries")
         ax1.set_xlabel("Game Number")
 
@@ -181,7 +193,7 @@ class CLI:
             cmd = input("\nChoose action: ")
             match cmd.lower():
                 case "checker":
-                    self.checker_menu()
+                    self.checker_menu(ctrl)
                 case "save":
                     self.save_menu()
                 case "get":
@@ -190,6 +202,13 @@ class CLI:
                     print(f"Backup made to '{ctrl.backup()}'")
                 case "stats":
                     self.stats_menu(ctrl)
+                case "refresh" if self.game == GameType.WORDLE:
+                    try:
+                        if self.word_ctrl.refresh_words():
+                            print("Word list updated.")
+                        else: print("Word list already up to date.")
+                    except Exception as e:
+                        print(e)
                 case "exit":
                     break
                 case "quit":
@@ -214,9 +233,10 @@ class CLI:
                     break
 
 
-if __name__ == '__main__':
+def load_repositories(settings_path: str = "settings.toml"):
+    """Wordle and Nerdle repositories configured in the settings file, or the default csv files."""
     try:
-        with open("settings.toml", "rb") as f:
+        with open(settings_path, "rb") as f:
             data = tomllib.load(f)
         
         if 'wordle_repo_path' not in data:
@@ -225,16 +245,36 @@ if __name__ == '__main__':
             data['nerdle_repo_path'] = "data/nerdles.csv"
         if 'db_repo' not in data:
             data['db_repo'] = False
+        if 'bin_repo' not in data:
+            data['bin_repo'] = False
 
         if data['db_repo']:
             word_repo = RepositoryDb(data['wordle_repo_path'], WordleGame)
             nerd_repo = RepositoryDb(data['nerdle_repo_path'], NerdleGame)
+        elif data['bin_repo']:
+            word_repo = RepositoryBin(data['wordle_repo_path'], WordleGame)
+            nerd_repo = RepositoryBin(data['nerdle_repo_path'], NerdleGame)
         else:
             word_repo = Repository(data['wordle_repo_path'], WordleGame)
             nerd_repo = Repository(data['nerdle_repo_path'], NerdleGame)
     except:
         word_repo = Repository("data/wordles.csv", WordleGame)
         nerd_repo = Repository("data/nerdles.csv", NerdleGame)
-    
-    ui = CLI(WordleCtrl(word_repo), NerdleCtrl(nerd_repo))
+    return word_repo, nerd_repo
+
+
+def wordle_settings(settings_path: str = "settings.toml") -> dict:
+    """WordleCtrl options of the settings file: the decision tree's path ('tree_path') or opener ('tree_opener')."""
+    try:
+        with open(settings_path, "rb") as f:
+            data = tomllib.load(f)
+    except (OSError, tomllib.TOMLDecodeError):
+        return {}
+    return {key: data[key] for key in ('tree_path', 'tree_opener') if key in data}
+
+
+if __name__ == '__main__':
+    instrument.configure()
+    word_repo, nerd_repo = load_repositories()
+    ui = CLI(WordleCtrl(word_repo, **wordle_settings()), NerdleCtrl(nerd_repo))
     ui.choose_game()
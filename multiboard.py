@@ -0,0 +1,113 @@
+"""
+Several boards played with the same guesses (Dordle, Quordle, Octordle...), on words of any length.
+Every board keeps its own runner and candidates, narrowed only by its own results, and guesses are
+ranked by the information they give on all the unsolved boards together.
+"""
+from utils import *
+from candidates import CandidateFilter, CandidateSet
+from feedback import pattern_codes
+from solver import partition_entropy
+from wordle import WordleRunner, WordleSimulation
+import numpy as np
+
+
+class MultiBoardSimulation:
+    """Results of a guess on every board, one solution per board."""
+    def __init__(self, solutions: list[str]):
+        self.boards = [WordleSimulation(s) for s in solutions]
+
+    def result(self, word: str) -> list[str]:
+        return [board.result(word) for board in self.boards]
+
+    def result_many(self, words) -> np.ndarray:
+        """(words, boards) array of pattern codes."""
+        return np.stack([board.result_many(words) for board in self.boards], axis=1)
+
+
+class MultiBoard:
+    """
+    Boards sharing one sequence of guesses. A board is solved once a guess gets all greens there,
+    after which it takes no more results.
+    """
+    BLOCK_ROWS = 256
+
+    def __init__(self, word_filter: CandidateFilter, boards: int = 4):
+        self.word_filter = word_filter
+        self.length = word_filter.words.length
+        self.runners = [WordleRunner(self.length) for _ in range(boards)]
+        self.candidates = [CandidateSet(word_filter) for _ in range(boards)]
+        self.tries = []
+
+    @property
+    def solved(self) -> list[bool]:
+        return [runner.solution is not None for runner in self.runners]
+
+    @property
+    def finished(self) -> bool:
+        return all(self.solved)
+
+    def add_try(self, word: str, results: list[str|None]) -> None:
+        """Plays the word with its result on every board (None, or anything, for the boards already solved)."""
+        if len(results) != len(self.runners):
+            raise ValueError(f"Expected {len(self.runners)} results, one per board.")
+        playing = [not solved for solved in self.solved]
+        for board in np.flatnonzero(playing):
+            WordleRunner.validate_try(word, results[board], self.length)
+
+        for board in np.flatnonzero(playing):
+            self.runners[board].add_try(word, results[board])
+            self.candidates[board].narrow(word, results[board])
+        self.tries.append((word.lower(), playing))
+
+    def pop_try(self) -> str:
+        """Undoes the last guess on the boards that took it, returning the word."""
+        if len(self.tries) == 0:
+            raise Exception("No try to undo.")
+        word, playing = self.tries.pop()
+        for board in np.flatnonzero(playing):
+            self.runners[board].pop_try()
+            self.candidates[board].pop()
+        return word
+
+    def possible_solutions(self, limit: int|None = None) -> list[list[str]]:
+        """Candidates of every board; a solved board only has its solution."""
+        return [[runner.solution] if runner.solution is not None else candidates.words(limit)
+                for runner, candidates in zip(self.runners, self.candidates)]
+
+    def entropies(self, guesses=None, feedback=None) -> np.ndarray:
+        """
+        Sum over the unsolved boards of the information each guess (all words by default) gives about the board.
+        Guesses are scored once against the union of the boards' candidates, through the feedback matrix
+        of the word list if one is given, then that block is split between the boards.
+        """
+        boards = [c.indices for c, solved in zip(self.candidates, self.solved) if not solved]
+        words = self.word_filter.words
+        guesses = np.arange(len(words)) if guesses is None else np.asarray(guesses, dtype=np.int64)
+        scores = np.zeros(len(guesses))
+        if not boards:
+            return scores
+
+        union, inverse = np.unique(np.concatenate(boards), return_inverse=True)
+        columns = np.split(inverse, np.cumsum([len(b) for b in boards])[:-1])
+        targets = None if feedback is not None else words.ascii(union)
+        patterns = 3 ** self.length
+
+        for start in range(0, len(guesses), self.BLOCK_ROWS):
+            rows = guesses[start:start + self.BLOCK_ROWS]
+            if feedback is not None:
+                codes = feedback.patterns(rows, union)
+            else:
+                codes = pattern_codes(words.ascii(rows), targets)
+            for board_columns in columns:
+                scores[start:start + len(rows)] += partition_entropy(codes[:, board_columns], patterns)
+        return scores
+
+    def rank(self, k: int = 10, feedback=None) -> list[tuple[str, float]]:
+        """Top k guesses with their information in bits; on ties, guesses that could solve a board come first."""
+        scores = self.entropies(feedback=feedback)
+        is_candidate = np.zeros(len(scores), dtype=bool)
+        for c, solved in zip(self.candidates, self.solved):
+            if not solved:
+                is_candidate[c.indices] = True
+        order = np.lexsort((~is_candidate, -scores))[:k]
+        return [(self.word_filter.words[i], float(scores[i])) for i in order]
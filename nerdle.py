@@ -1,18 +1,32 @@
 from abstract import *
 from utils import *
 from ctrl import Controller
+from candidates import CandidateFilter, CandidateSet, try_constraints
+from equation import load_equations, is_valid_equation, NERDLE_LENGTH
+from wordtable import word_result
+from feedback import encode_many, guesses_codes, solutions_codes, result_to_code, code_to_result
 import datetime
+import threading
+import numpy as np
 
 
 class NerdleGame(AbstractGame):
+    """A saved game; results are kept as their base-3 codes (see feedback) and decoded when read."""
     NAME = "NERDLE"
+    LENGTH = NERDLE_LENGTH
+    ALPHABET = "0123456789+-*/="
+    __slots__ = ("date", "tries", "codes", "solution")
 
     def __init__(self, date: datetime.date, tries: list[str], results: list[str], solution: str):
         self.date = date
         self.tries = tries
-        self.results = results
+        self.codes = tuple(result_to_code(r) for r in results)
         self.solution = solution
 
+    @property
+    def results(self) -> list[str]:
+        return [code_to_result(code, len(self.solution)) for code in self.codes]
+
     @staticmethod
     def from_repr(representation: str):
         date0, tries, results, solution = representation.split(",")
@@ -29,42 +43,63 @@ class NerdleGame(AbstractGame):
         return s
 
 
-def is_valid_equation(equation: str) -> bool:
-    ls, rs = equation.split("=")
-    return len(equation) == 8 and eval(ls, {"__builtins__": {}}, {}) == eval(rs, {"__builtins__": {}}, {})
-
-
 class NerdleSimulation(AbstractSimulation):
     def __init__(self, solution: str):
         self.solution = solution
     
     def result(self, equation: str) -> str:
-        eq_chars = list(equation)
-        winner = list(self.solution)
-        res = [ResultKey.GRAY for _ in range(8)]
+        return word_result(equation, self.solution)
 
-        for i, c in enumerate(eq_chars):
-            if c == winner[i]:
-                res[i] = ResultKey.GREEN
-                eq_chars[i] = winner[i] = ResultKey.GRAY
-        
-        for i, c in enumerate(eq_chars):
-            if c != ResultKey.GRAY and c in winner:
-                res[i] = ResultKey.YELLOW
-                eq_chars[i] = winner[winner.index(c)] = ResultKey.GRAY
+    def result_many(self, equations) -> np.ndarray:
+        solution = encode_many(self.solution, len(self.solution), NerdleGame.ALPHABET)[0]
+        return guesses_codes(encode_many(equations, len(solution), NerdleGame.ALPHABET), solution)
 
-        return "".join(res)
+    @staticmethod
+    def result_many_solutions(equation: str, solutions) -> np.ndarray:
+        guess = encode_many(equation, len(equation), NerdleGame.ALPHABET)[0]
+        return solutions_codes(guess, encode_many(solutions, len(guess), NerdleGame.ALPHABET))
 
 
 class NerdleRunner(AbstractRunner):
     def __init__(self):
-        raise NotImplementedError("NerdleRunner is not implemented yet")
-    
-    def add_try(self):
-        raise NotImplementedError("NerdleRunner is not implemented yet")
-    
+        self.green_chars: dict[int, str|None] = {i: None for i in range(1, NERDLE_LENGTH+1)}
+        self.yellow_chars = {i: "" for i in range(1, NERDLE_LENGTH+1)}
+        self.gray_chars = ""
+        self.solution = None
+
+        self.tries = []
+        self.results = []
+
+    def add_try(self, equation_tried: str, result: str) -> None:
+        NerdleRunner.validate_try(equation_tried, result)
+
+        self.tries.append(equation_tried)
+        self.results.append(result)
+
+        if set(result) == {ResultKey.GREEN}:
+            self.solution = equation_tried
+
+        grays, yellows, greens = try_constraints(equation_tried, result)
+        self.gray_chars += grays
+        for i in yellows:
+            self.yellow_chars[i] += yellows[i]
+            if greens[i] is not None:
+                self.green_chars[i] = greens[i]
+
+    def pop_try(self) -> tuple[str, str]:
+        """Undoes the last try, returning it with its result."""
+        if len(self.tries) == 0:
+            raise Exception("No try to undo.")
+        tries, results = self.tries[:-1], self.results[:-1]
+        last = self.tries[-1], self.results[-1]
+
+        self.__init__()
+        for equation_tried, result in zip(tries, results):
+            self.add_try(equation_tried, result)
+        return last
+
     def get_data(self):
-        raise NotImplementedError("NerdleRunner is not implemented yet")
+        return self.gray_chars, self.yellow_chars, self.green_chars
 
     @staticmethod
     def validate_try(string: str, result: str|None = None) -> None:
@@ -80,11 +115,46 @@ class NerdleRunner(AbstractRunner):
 
 
 class NerdleCtrl(Controller):
-    def __init__(self, repo):
+    ALPHABET = NerdleGame.ALPHABET
+
+    def __init__(self, repo, equations_cache_path=None):
         self.repo = repo
         super().__init__(NerdleRunner)
+        self.equations_cache_path = equations_cache_path
+        self._equation_filter = None
+        self._filter_lock = threading.Lock()
+        self.candidates = None
+
+    @property
+    def equation_filter(self) -> CandidateFilter:
+        """
+        Every valid equation, loaded (or generated the first time) when the checker is first used,
+        once even if several threads ask for it first.
+        """
+        with self._filter_lock:
+            if self._equation_filter is None:
+                self._equation_filter = CandidateFilter(load_equations(NERDLE_LENGTH, self.equations_cache_path), NerdleCtrl.ALPHABET)
+            return self._equation_filter
+
+    @property
+    def all_equations(self) -> list[str]:
+        return self.equation_filter.words
+
+    def start(self):
+        super().start()
+        self.candidates = CandidateSet(self.equation_filter)
+
+    def add_try(self, tried: str, result: str) -> None:
+        super().add_try(tried, result)
+        self.candidates.narrow(tried, result)
+
+    def pop_try(self):
+        last = super().pop_try()
+        self.candidates.pop()
+        return last
 
     def get_possible_solutions(self):
         if self.runner is None:
             raise Exception("Game not started.")
-        raise NotImplementedError("NerdleRunner is not implemented yet")
+
+        return self.candidates.words()
@@ -1,40 +1,170 @@
 import shutil, os
 import datetime
+import hashlib
+import json
 import sqlite3
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from feedback import pattern_dtype, code_to_result
+from wordtable import BITS, CHAR_MASK, pack
+import numpy as np
 
 
 class Repository:
+    """
+    Games stored one per line in a CSV file, in the order they were played. A sidecar index
+    (`<filename>.idx`) maps each row's date to its byte offset so lookups binary search the index
+    and only read the rows they return.
+    """
+    INDEX_HEADER = struct.Struct("<q")  # size of the csv covered by the index
+    READ_BUFFER = 1 << 16
+
     def __init__(self, filename: str, game_class):
         self.filename = filename
+        self.index_filename = filename + ".idx"
+        self.stats_filename = filename + ".stats"
         self.game_class = game_class
 
         with open(self.filename, 'a+') as f:
             pass
+
+        self._load_index()
     
+    def _reset_index(self):
+        self._days, self._offsets, self._indexed_size = array('q'), array('q'), 0
+        self._in_order = True
+
+    def _load_index(self):
+        self._reset_index()
+        try:
+            with open(self.index_filename, 'rb') as f:
+                data = f.read()
+            (indexed_size,) = Repository.INDEX_HEADER.unpack_from(data)
+            pairs = array('q', data[Repository.INDEX_HEADER.size:])
+            self._days, self._offsets = pairs[0::2], pairs[1::2]
+            self._indexed_size = indexed_size
+            self._in_order = all(self._days[i] <= self._days[i+1] for i in range(len(self._days)-1))
+            valid = self._index_matches()
+        except (OSError, struct.error, ValueError):
+            valid = False
+        
+        if not valid:
+            self._reset_index()
+            self._save_index()
+        self._sync()
+
+    def _index_matches(self) -> bool:
+        if self._indexed_size > os.path.getsize(self.filename) or len(self._days) != len(self._offsets):
+            return False
+        if len(self._offsets) == 0:
+            return True
+        with open(self.filename, 'rb') as f:
+            f.seek(self._offsets[-1])
+            line = f.readline()
+        return line[:10] == datetime.date.fromordinal(self._days[-1]).isoformat().encode()
+
+    def _sync(self):
+        """Indexes rows appended to the csv by anything else than this repository."""
+        size = os.path.getsize(self.filename)
+        if size == self._indexed_size:
+            return
+        if size < self._indexed_size:
+            self._reset_index()
+
+        with open(self.filename, 'rb') as f:
+            f.seek(self._indexed_size)
+            offset = self._indexed_size
+            for line in f:
+                if line.strip():
+                    self._append_entry(datetime.date.fromisoformat(line[:10].decode()).toordinal(), offset)
+                offset += len(line)
+        self._indexed_size = size
+        self._save_index()
+
+    def _save_index(self):
+        pairs = array('q', [0]) * (2 * len(self._days))
+        pairs[0::2], pairs[1::2] = self._days, self._offsets
+        with open(self.index_filename, 'wb') as f:
+            f.write(Repository.INDEX_HEADER.pack(self._indexed_size))
+            pairs.tofile(f)
+
+    def _append_entry(self, day: int, offset: int):
+        if len(self._days) and day < self._days[-1]:
+            self._in_order = False
+        self._days.append(day)
+        self._offsets.append(offset)
+
+    def _read_rows(self, start: int, stop: int) -> list[str]:
+        """Lines of the index entries [start, stop), read in one go."""
+        if start >= stop:
+            return []
+        with open(self.filename, 'rb') as f:
+            f.seek(self._offsets[start])
+            end = self._offsets[stop] if stop < len(self._offsets) else self._indexed_size
+            data = f.read(end - self._offsets[start])
+        return [line for line in data.decode().split('\n') if line.strip()]
+
     def add(self, game):
-        with open(self.filename, 'a') as f:
-            print(repr(game), file=f)
+        self._sync()
+        line = (repr(game) + '\n').encode()
+        with open(self.filename, 'ab') as f:
+            f.write(line)
+
+        self._append_entry(game.date.toordinal(), self._indexed_size)
+        self._indexed_size += len(line)
+        with open(self.index_filename, 'r+b') as f:
+            f.write(Repository.INDEX_HEADER.pack(self._indexed_size))
+            f.seek(0, os.SEEK_END)
+            array('q', [self._days[-1], self._offsets[-1]]).tofile(f)
     
     def get(self, date):
-        result = []
-        with open(self.filename, 'r') as f:
-            result = f.readlines()
-        
-        if len(result) == 0:
+        self._sync()
+        if len(self._days) == 0:
             return None
         
         if date is None:
-            return self.game_class.from_repr(result[-1].strip())
+            return self.game_class.from_repr(self._read_rows(len(self._days)-1, len(self._days))[0])
         
-        for line in result:
-            if line.startswith(date.isoformat()):
-                return self.game_class.from_repr(line.strip())
+        day = date.toordinal()
+        if self._in_order:
+            i = bisect_left(self._days, day)
+            if i == len(self._days) or self._days[i] != day:
+                return None
+        elif day in self._days:
+            i = self._days.index(day)
+        else:
+            return None
+        return self.game_class.from_repr(self._read_rows(i, i+1)[0])
+
+    def get_range(self, start: datetime.date, end: datetime.date):
+        """Games played from start to end, both included."""
+        self._sync()
+        if self._in_order:
+            return [self.game_class.from_repr(line) for line in
+                    self._read_rows(bisect_left(self._days, start.toordinal()), bisect_right(self._days, end.toordinal()))]
         
-        return None
+        lines = [self._read_rows(i, i+1)[0] for i, day in enumerate(self._days) if start.toordinal() <= day <= end.toordinal()]
+        return [self.game_class.from_repr(line) for line in lines]
+
+    def count(self) -> int:
+        self._sync()
+        return len(self._days)
+
+    def last_date(self) -> datetime.date|None:
+        """Date of the last game added, read from the index."""
+        self._sync()
+        return datetime.date.fromordinal(self._days[-1]) if len(self._days) else None
     
+    def iter_games(self):
+        """Games in file order, read through a buffer and parsed one at a time."""
+        with open(self.filename, 'r', buffering=Repository.READ_BUFFER) as f:
+            for line in f:
+                if line.strip():
+                    yield self.game_class.from_repr(line.strip())
+
     def get_all(self):
-        with open(self.filename, 'r') as f:
-            return [self.game_class.from_repr(line) for line in f.readlines()]
+        return list(self.iter_games())
 
     def backup(self, date: datetime.datetime):
         filename, file_extension = os.path.splitext(self.filename)
@@ -44,12 +174,20 @@ class Repository:
 
 
 class RepositoryDb:
+    """Games stored in an SQLite table indexed (and unique) by date, in WAL mode."""
     def __init__(self, path, game_class):
         self.path = path
         self.game_class = game_class
         self.conn = sqlite3.connect(self.path, detect_types=sqlite3.PARSE_DECLTYPES|sqlite3.PARSE_COLNAMES)
+        self._configure()
         self._create_table()
     
+    def _configure(self):
+        if self.path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+
     def _create_table(self):
         cursor = self.conn.cursor()
         cursor.execute(f"""
@@ -57,17 +195,37 @@ class RepositoryDb:
                 date DATE, tries TEXT, results TEXT, solution TEXT
             )
         """)
+        try:
+            cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {self.game_class.NAME}_date ON {self.game_class.NAME} (date)")
+        except sqlite3.IntegrityError:
+            # older databases may hold several games for a date, keep them and index without the constraint
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {self.game_class.NAME}_date ON {self.game_class.NAME} (date)")
         self.conn.commit()
 
+    @staticmethod
+    def _row(game):
+        return game.date, ' '.join(game.tries), ' '.join(game.results), game.solution
+
     def add(self, game):
-        cursor = self.conn.cursor()
-        cursor.execute(f"INSERT INTO {self.game_class.NAME} VALUES (?, ?, ?, ?)",
-            (game.date, ' '.join(game.tries), ' '.join(game.results), game.solution))
-        self.conn.commit()
+        try:
+            with self.conn:
+                self.conn.execute(f"INSERT INTO {self.game_class.NAME} VALUES (?, ?, ?, ?)", RepositoryDb._row(game))
+        except sqlite3.IntegrityError:
+            raise ValueError(f"A game is already saved for {game.date}.")
+
+    def add_many(self, games) -> int:
+        """Inserts the games in one transaction, skipping dates already saved. Returns how many were inserted."""
+        with self.conn:
+            cursor = self.conn.executemany(f"INSERT OR IGNORE INTO {self.game_class.NAME} VALUES (?, ?, ?, ?)",
+                                           (RepositoryDb._row(game) for game in games))
+        return cursor.rowcount
     
     def get(self, date):
         cursor = self.conn.cursor()
-        cursor.execute(f"SELECT * FROM {self.game_class.NAME} WHERE date = ?", (date,))
+        if date is None:
+            cursor.execute(f"SELECT * FROM {self.game_class.NAME} ORDER BY rowid DESC LIMIT 1")
+        else:
+            cursor.execute(f"SELECT * FROM {self.game_class.NAME} WHERE date = ?", (date,))
         result = cursor.fetchone()
         
         if result is None:
@@ -75,23 +233,306 @@ class RepositoryDb:
 
         return self.game_class(result[0], result[1].split(), result[2].split(), result[3])
 
-    def get_all(self):
+    def get_range(self, start: datetime.date, end: datetime.date):
+        """Games played from start to end, both included."""
         cursor = self.conn.cursor()
-        cursor.execute(f"SELECT * FROM {self.game_class.NAME}")
-
+        cursor.execute(f"SELECT * FROM {self.game_class.NAME} WHERE date BETWEEN ? AND ? ORDER BY date", (start, end))
         return [self.game_class(row[0], row[1].split(), row[2].split(), row[3]) for row in cursor.fetchall()]
 
+    def count(self) -> int:
+        return self.conn.execute(f"SELECT COUNT(*) FROM {self.game_class.NAME}").fetchone()[0]
+
+    def iter_games(self, batch_size: int = 256):
+        """Games in insertion order, fetched from the cursor in batches."""
+        cursor = self.conn.cursor()
+        cursor.execute(f"SELECT * FROM {self.game_class.NAME} ORDER BY rowid")
+
+        while rows := cursor.fetchmany(batch_size):
+            for row in rows:
+                yield self.game_class(row[0], row[1].split(), row[2].split(), row[3])
+
+    def get_all(self):
+        return list(self.iter_games())
+
+    # score of a game: its number of tries, one more if the last result is not all green
+    SCORE_SQL = ("length(results) - length(replace(results, ' ', '')) + 1"
+                 " + (substr(results, -length(solution)) != replace(hex(zeroblob(length(solution))), '00', 'G'))")
+
+    # consecutive days share the same day - row number (gaps and islands)
+    STREAKS_SQL = """
+        WITH days AS (SELECT DISTINCT julianday(date) AS day FROM {name}),
+        islands AS (SELECT day, day - ROW_NUMBER() OVER (ORDER BY day) AS island FROM days)
+        SELECT COUNT(*) AS length, date(MIN(day)) AS start, date(MAX(day)) AS end FROM islands GROUP BY island
+    """
+
+    def score_distribution(self) -> dict[int, int]:
+        cursor = self.conn.execute(f"SELECT {RepositoryDb.SCORE_SQL} AS score, COUNT(*) FROM {self.game_class.NAME} GROUP BY score")
+        return dict(cursor.fetchall())
+
+    def scores(self) -> list[int]:
+        """Score of every game, in insertion order."""
+        cursor = self.conn.execute(f"SELECT {RepositoryDb.SCORE_SQL} FROM {self.game_class.NAME} ORDER BY rowid")
+        return [row[0] for row in cursor.fetchall()]
+
+    def _streak(self, order: str):
+        row = self.conn.execute(RepositoryDb.STREAKS_SQL.format(name=self.game_class.NAME) + f" ORDER BY {order} LIMIT 1").fetchone()
+        if row is None:
+            return None
+        return row[0], datetime.date.fromisoformat(row[1]), datetime.date.fromisoformat(row[2])
+
+    def longest_streak(self):
+        """(days, first date, last date) of the longest run of consecutive days, the earliest one on ties."""
+        return self._streak("length DESC, start")
+
+    def last_streak(self):
+        """(days, first date, last date) of the run of consecutive days ending with the latest game."""
+        return self._streak("end DESC")
+
+    def current_streak(self, today: datetime.date|None = None):
+        today = today or datetime.date.today()
+        streak = self.last_streak()
+        if streak is None or streak[2] not in (today - datetime.timedelta(days=1), today):
+            return None
+        return streak[0]
+
     def backup(self, date: datetime.datetime):
         if self.path == ":memory:":
             return ":memory:"
         
         filename, file_extension = os.path.splitext(self.path)
         backup_file = f"{filename}_{date.strftime('%Y%m%d-%H%M%S')}{file_extension}"
-        shutil.copy2(self.path, backup_file)
+        # copying the file could miss what is still in the WAL, the backup API gets a consistent snapshot
+        target = sqlite3.connect(backup_file)
+        with target:
+            self.conn.backup(target)
+        target.close()
         return backup_file
 
 
-def csv_to_db(repo_csv, repo_db):
-    games = repo_csv.get_all()
+class RepositoryBin:
+    """
+    Games stored column by column in a directory of fixed-width binary files: day number, number of tries,
+    packed solution (see wordtable), packed tries and their result codes. `meta.json` holds the number of
+    committed rows. Columns are memory-mapped, so opening is instant and stats are computed on whole columns.
+    """
+    VERSION = 1
+    MAX_TRIES = 6
+
+    def __init__(self, path: str, game_class):
+        self.path = path
+        self.game_class = game_class
+        self.length = game_class.LENGTH
+        self.char_codes = {c: i for i, c in enumerate(game_class.ALPHABET)}
+        self._alphabet = np.frombuffer(game_class.ALPHABET.encode("ascii"), dtype=np.uint8)
+        self.meta_path = os.path.join(path, "meta.json")
+
+        word = np.uint32 if self.length * BITS <= 32 else np.uint64
+        self.columns = {
+            "date": (np.int32, ()),
+            "count": (np.uint8, ()),
+            "solution": (word, ()),
+            "tries": (word, (RepositoryBin.MAX_TRIES,)),
+            "codes": (pattern_dtype(self.length), (RepositoryBin.MAX_TRIES,)),
+        }
+
+        os.makedirs(path, exist_ok=True)
+        try:
+            with open(self.meta_path, 'r') as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            meta = self._write_meta(0)
+        if meta.get("version") != RepositoryBin.VERSION or meta.get("game") != game_class.NAME or meta.get("length") != self.length:
+            raise ValueError(f"'{path}' does not hold {game_class.NAME} games.")
+        self._open(meta["count"])
+
+    def _write_meta(self, count: int) -> dict:
+        meta = {"version": RepositoryBin.VERSION, "game": self.game_class.NAME, "length": self.length, "count": count}
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+        return meta
+
+    def _column_path(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.bin")
+
+    def _open(self, count: int):
+        self._count = count
+        self.data = {}
+        for name, (dtype, shape) in self.columns.items():
+            if count == 0:
+                self.data[name] = np.zeros((0,) + shape, dtype=dtype)
+            else:
+                self.data[name] = np.memmap(self._column_path(name), dtype=dtype, mode='r', shape=(count,) + shape)
+
+    def _encode(self, games) -> dict[str, np.ndarray]:
+        rows = {name: np.zeros((len(games),) + shape, dtype=dtype) for name, (dtype, shape) in self.columns.items()}
+        for i, game in enumerate(games):
+            if len(game.tries) > RepositoryBin.MAX_TRIES:
+                raise ValueError(f"A game can have at most {RepositoryBin.MAX_TRIES} tries.")
+            rows["date"][i] = game.date.toordinal()
+            rows["count"][i] = len(game.tries)
+            rows["solution"][i] = pack(game.solution.lower(), self.char_codes)
+            rows["tries"][i, :len(game.tries)] = [pack(t.lower(), self.char_codes) for t in game.tries]
+            rows["codes"][i, :len(game.codes)] = game.codes
+        return rows
+
+    def _decode_words(self, packed: np.ndarray) -> list[str]:
+        """Packed words of any shape, decoded together into a flat list."""
+        packed = packed.ravel()
+        shifts = np.arange(self.length - 1, -1, -1, dtype=packed.dtype) * packed.dtype.type(BITS)
+        codes = (packed[:, None] >> shifts) & packed.dtype.type(CHAR_MASK)
+        text = self._alphabet[codes].tobytes().decode("ascii")
+        return [text[i:i + self.length] for i in range(0, len(text), self.length)]
+
+    def _games(self, rows) -> list:
+        """Games at the given row numbers, each column read and decoded at once."""
+        rows = np.asarray(rows, dtype=np.int64)
+        counts = self.data["count"][rows].tolist()
+        solutions = self._decode_words(self.data["solution"][rows])
+        tries = self._decode_words(self.data["tries"][rows])
+        codes = self.data["codes"][rows].tolist()
+
+        games = []
+        for i, (day, count) in enumerate(zip(self.data["date"][rows].tolist(), counts)):
+            games.append(self.game_class(datetime.date.fromordinal(day),
+                                         tries[i * RepositoryBin.MAX_TRIES:i * RepositoryBin.MAX_TRIES + count],
+                                         [code_to_result(c, self.length) for c in codes[i][:count]],
+                                         solutions[i]))
+        return games
+
+    def _append(self, games) -> None:
+        rows = self._encode(games)
+        for name, column in rows.items():
+            path = self._column_path(name)
+            with open(path, 'ab') as f:
+                f.truncate(self._count * column[0:1].nbytes)  # drop rows of an interrupted append
+                f.write(column.tobytes())
+        self._write_meta(self._count + len(games))
+        self._open(self._count + len(games))
+
+    def add(self, game):
+        if (self.data["date"] == game.date.toordinal()).any():
+            raise ValueError(f"A game is already saved for {game.date}.")
+        self._append([game])
+
+    def add_many(self, games) -> int:
+        """Appends the games whose date is not saved yet. Returns how many were added."""
+        seen = set(self.data["date"].tolist())
+        new = []
+        for game in games:
+            if game.date.toordinal() not in seen:
+                seen.add(game.date.toordinal())
+                new.append(game)
+        if new:
+            self._append(new)
+        return len(new)
+
+    def get(self, date):
+        if self._count == 0:
+            return None
+        if date is None:
+            return self._games([self._count - 1])[0]
+        rows = np.flatnonzero(self.data["date"] == date.toordinal())
+        return self._games(rows[:1])[0] if len(rows) else None
+
+    def get_range(self, start: datetime.date, end: datetime.date):
+        """Games played from start to end, both included."""
+        dates = self.data["date"]
+        rows = np.flatnonzero((dates >= start.toordinal()) & (dates <= end.toordinal()))
+        return self._games(rows[np.argsort(dates[rows], kind="stable")])
+
+    def count(self) -> int:
+        return self._count
+
+    def iter_games(self, batch_size: int = 1024):
+        """Games in insertion order, decoded in batches."""
+        for start in range(0, self._count, batch_size):
+            yield from self._games(range(start, min(start + batch_size, self._count)))
+
+    def get_all(self):
+        return list(self.iter_games())
+
+    def scores(self) -> np.ndarray:
+        """Score of every game, in insertion order: its number of tries, one more if the last result is not all green."""
+        count = self.data["count"].astype(np.int64)
+        last = self.data["codes"][np.arange(self._count), np.maximum(count - 1, 0)]
+        return count + (last != 3 ** self.length - 1)
+
+    def score_distribution(self) -> dict[int, int]:
+        scores, counts = np.unique(self.scores(), return_counts=True)
+        return dict(zip(scores.tolist(), counts.tolist()))
+
+    def _streaks(self):
+        """First and last day of every run of consecutive days."""
+        days = np.unique(self.data["date"])
+        breaks = np.flatnonzero(np.diff(days) != 1) + 1
+        return days[np.concatenate(([0], breaks))], days[np.concatenate((breaks, [len(days)])) - 1]
+
+    @staticmethod
+    def _streak(first: int, last: int):
+        return int(last - first + 1), datetime.date.fromordinal(int(first)), datetime.date.fromordinal(int(last))
+
+    def longest_streak(self):
+        """(days, first date, last date) of the longest run of consecutive days, the earliest one on ties."""
+        if self._count == 0:
+            return None
+        firsts, lasts = self._streaks()
+        i = int(np.argmax(lasts - firsts))
+        return RepositoryBin._streak(firsts[i], lasts[i])
+
+    def last_streak(self):
+        """(days, first date, last date) of the run of consecutive days ending with the latest game."""
+        if self._count == 0:
+            return None
+        firsts, lasts = self._streaks()
+        return RepositoryBin._streak(firsts[-1], lasts[-1])
+
+    def current_streak(self, today: datetime.date|None = None):
+        today = today or datetime.date.today()
+        streak = self.last_streak()
+        if streak is None or streak[2] not in (today - datetime.timedelta(days=1), today):
+            return None
+        return streak[0]
+
+    def backup(self, date: datetime.datetime):
+        backup_dir = f"{self.path.rstrip(os.sep)}_{date.strftime('%Y%m%d-%H%M%S')}"
+        shutil.copytree(self.path, backup_dir)
+        return backup_dir
+
+
+class MigrationError(Exception):
+    pass
+
+
+def _games_checksum(games) -> tuple[int, int]:
+    """Number of distinct dates and an order independent checksum of the first game saved for each."""
+    seen = set()
+    checksum = 0
     for game in games:
-        repo_db.add(game)
+        if game.date in seen:
+            continue
+        seen.add(game.date)
+        checksum = (checksum + int.from_bytes(hashlib.sha256(repr(game).encode()).digest()[:8], 'little')) % (1 << 64)
+    return len(seen), checksum
+
+
+def csv_to_db(repo_csv, repo_db, chunk_size: int = 1000) -> int:
+    """
+    Copies the csv games into the database in chunks, each in its own transaction. Dates already in the
+    database are skipped, so an interrupted migration can simply be run again. Afterwards the row count
+    and a checksum of both sides are compared. Returns how many games were inserted.
+    """
+    inserted = 0
+    chunk = []
+    for game in repo_csv.iter_games():
+        chunk.append(game)
+        if len(chunk) == chunk_size:
+            inserted += repo_db.add_many(chunk)
+            chunk = []
+    inserted += repo_db.add_many(chunk)
+
+    expected = _games_checksum(repo_csv.iter_games())
+    if repo_db.count() != expected[0] or _games_checksum(repo_db.iter_games()) != expected:
+        raise MigrationError(f"Database does not match '{repo_csv.filename}' after migrating.")
+    return inserted
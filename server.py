@@ -0,0 +1,228 @@
+"""
+Local HTTP/JSON service for the checker, with one independent game per session.
+
+    python server.py [--host 127.0.0.1] [--port 8080] [--workers 4] [--words <url or file>] [--tree <file>]
+
+    POST   /sessions                      {"game": "wordle"}              -> {"session": id}
+    GET    /sessions/<id>                                                 -> tries, results and candidates count
+    DELETE /sessions/<id>
+    POST   /sessions/<id>/tries           {"try": "close", "result": "G_Y__"} -> {"count": n}
+    DELETE /sessions/<id>/tries           undoes the last try             -> {"count": n}
+    GET    /sessions/<id>/solutions?limit=20                              -> {"count": n, "solutions": [...]}
+    GET    /sessions/<id>/suggestions?k=10                                -> {"suggestions": [[guess, bits], ...]}
+
+Sessions share the controllers' word lists and filters (read only); each keeps its own runner and
+CandidateSet. Narrowing and ranking run in a thread pool so the event loop keeps serving other sessions,
+and large rankings are further split across the solver's process pool.
+"""
+from main import load_repositories, wordle_settings
+from wordle import WordleCtrl, WordleRunner
+from nerdle import NerdleCtrl, NerdleRunner
+from candidates import CandidateSet
+from utils import WORDS_LIST_LINK
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+import instrument
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           500: "Internal Server Error"}
+
+
+class Session:
+    def __init__(self, game: str, runner, candidates: CandidateSet):
+        self.game = game
+        self.runner = runner
+        self.candidates = candidates
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+    def add_try(self, tried: str, result: str) -> int:
+        self.runner.add_try(tried, result)
+        self.candidates.narrow(tried, result)
+        return len(self.candidates)
+
+    def pop_try(self) -> int:
+        self.runner.pop_try()
+        self.candidates.pop()
+        return len(self.candidates)
+
+    def to_dict(self) -> dict:
+        return {"game": self.game, "tries": self.runner.tries, "results": self.runner.results, "count": len(self.candidates)}
+
+
+class SolverService:
+    MAX_SESSIONS = 10000
+    SESSION_TTL = 3600  # seconds a session can stay unused
+
+    def __init__(self, word_ctrl: WordleCtrl, nerd_ctrl: NerdleCtrl, workers: int = 4):
+        self.ctrls = {"wordle": word_ctrl, "nerdle": nerd_ctrl}
+        self.runner_classes = {"wordle": WordleRunner, "nerdle": NerdleRunner}
+        self.sessions: OrderedDict[str, Session] = OrderedDict()
+        self.executor = ThreadPoolExecutor(workers)
+
+    def _filter(self, game: str):
+        ctrl = self.ctrls[game]
+        return ctrl.word_filter if game == "wordle" else ctrl.equation_filter
+
+    def _rank(self, session: Session, k: int):
+        return self.ctrls["wordle"].rank_guesses(session.runner, session.candidates.indices, k)
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    def _session(self, session_id: str) -> Session:
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise HttpError(404, "No such session.")
+        session.last_used = time.monotonic()
+        self.sessions.move_to_end(session_id)
+        return session
+
+    def _expire(self) -> None:
+        """Drops sessions unused for too long, and the least recently used ones above the limit."""
+        deadline = time.monotonic() - SolverService.SESSION_TTL
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if session.last_used > deadline and len(self.sessions) < SolverService.MAX_SESSIONS:
+                break
+            del self.sessions[session_id]
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> tuple[int, dict]:
+        url = urlsplit(target)
+        parts = [p for p in url.path.split("/") if p]
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            data = json.loads(body) if body else {}
+        except ValueError:
+            raise HttpError(400, "Body must be json.")
+
+        if not parts or parts[0] != "sessions" or len(parts) > 3:
+            raise HttpError(404, "Not found.")
+
+        if len(parts) == 1:
+            if method != "POST":
+                raise HttpError(405, "Use POST to start a session.")
+            game = str(data.get("game", "wordle")).lower()
+            if game not in self.ctrls:
+                raise HttpError(400, "'game' must be 'wordle' or 'nerdle'.")
+            word_filter = await self._run(self._filter, game)
+            self._expire()
+            session_id = uuid.uuid4().hex
+            self.sessions[session_id] = Session(game, self.runner_classes[game](), CandidateSet(word_filter))
+            return 201, {"session": session_id}
+
+        session = self._session(parts[1])
+        route = (method, parts[2] if len(parts) == 3 else None)
+        async with session.lock:
+            match route:
+                case ("GET", None):
+                    return 200, session.to_dict()
+                case ("DELETE", None):
+                    del self.sessions[parts[1]]
+                    return 200, {}
+                case ("POST", "tries"):
+                    if not isinstance(data.get("try"), str) or not isinstance(data.get("result"), str):
+                        raise HttpError(400, "'try' and 'result' are required.")
+                    try:
+                        return 200, {"count": await self._run(session.add_try, data["try"], data["result"].upper())}
+                    except Exception as e:
+                        raise HttpError(400, str(e))
+                case ("DELETE", "tries"):
+                    try:
+                        return 200, {"count": session.pop_try()}
+                    except Exception as e:
+                        raise HttpError(400, str(e))
+                case ("GET", "solutions"):
+                    limit = int(query["limit"]) if query.get("limit", "").isdigit() else None
+                    return 200, {"count": len(session.candidates), "solutions": session.candidates.words(limit)}
+                case ("GET", "suggestions"):
+                    if session.game != "wordle":
+                        raise HttpError(400, "Suggestions not available for Nerdle.")
+                    k = int(query["k"]) if query.get("k", "").isdigit() else 10
+                    return 200, {"suggestions": await self._run(self._rank, session, k)}
+                case _:
+                    raise HttpError(404, "Not found.")
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serves HTTP/1.1 requests of one connection, keeping it open between requests unless asked not to."""
+        try:
+            while request_line := await reader.readline():
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                try:
+                    status, payload = await self.dispatch(method, target, body)
+                except HttpError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Exception as e:
+                    status, payload = 500, {"error": str(e)}
+
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                content = json.dumps(payload).encode()
+                head = f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\nContent-Length: {len(content)}\r\n"
+                if not keep_alive:
+                    head += "Connection: close\r\n"
+                writer.write(head.encode("latin-1") + b"\r\n" + content)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.Server:
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    def close(self):
+        self.executor.shutdown()
+        self.ctrls["wordle"].close()
+
+
+async def serve(service: SolverService, host: str, port: int):
+    server = await service.start(host, port)
+    host, port = server.sockets[0].getsockname()[:2]
+    print(f"Listening on http://{host}:{port}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve the checker over HTTP/JSON")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080, help="0 picks a free port")
+    parser.add_argument("--workers", type=int, default=4, help="threads narrowing and ranking candidates")
+    parser.add_argument("--words", default=WORDS_LIST_LINK, help="url or file of the Wordle word list")
+    parser.add_argument("--tree", default=None, help="decision tree written by tree.py, instead of the settings' or the cached one")
+    parser.add_argument("--settings", default="settings.toml")
+    args = parser.parse_args()
+
+    instrument.configure(args.settings)
+    word_repo, nerd_repo = load_repositories(args.settings)
+    options = wordle_settings(args.settings)
+    if args.tree:
+        options["tree_path"] = args.tree
+    service = SolverService(WordleCtrl(word_repo, args.words, **options), NerdleCtrl(nerd_repo), args.workers)
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
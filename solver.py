@@ -0,0 +1,94 @@
+from feedback import FeedbackMatrix, candidate_columns
+from concurrent.futures import ProcessPoolExecutor
+import os
+import threading
+import numpy as np
+
+
+def partition_entropy(codes: np.ndarray, patterns: int) -> np.ndarray:
+    """Entropy in bits of the partition each row of pattern codes splits the candidates (columns) into."""
+    rows, candidates = codes.shape
+    if candidates == 0:
+        return np.zeros(rows)
+
+    if candidates < patterns * 4:
+        # few candidates: sort each row and measure the runs of equal codes
+        ordered = np.sort(codes, axis=1)
+        starts = np.ones(ordered.shape, dtype=bool)
+        starts[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+        first = np.flatnonzero(starts)
+        sizes = np.diff(np.append(first, ordered.size))
+        weighted = np.bincount(first // candidates, weights=sizes * np.log2(sizes), minlength=rows)
+    else:
+        counts = np.empty((rows, patterns), dtype=np.int64)
+        for i in range(rows):
+            counts[i] = np.bincount(codes[i], minlength=patterns)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weighted = np.where(counts > 0, counts * np.log2(counts), 0.0).sum(axis=1)
+
+    return np.log2(candidates) - weighted / candidates
+
+
+_matrix = None
+
+def _init_worker(path: str):
+    global _matrix
+    _matrix = np.load(path, mmap_mode='r')
+
+def _score_rows(start: int, stop: int, candidates: np.ndarray, patterns: int) -> np.ndarray:
+    return partition_entropy(candidate_columns(_matrix, start, stop, candidates), patterns)
+
+
+class Solver:
+    """
+    Ranks guesses by the expected information they give about the remaining candidates.
+    Guess rows are split across a process pool whose workers memory-map the feedback matrix file
+    themselves, so tasks only carry row ranges and candidate indices.
+    """
+    BLOCK_ROWS = 512
+    POOL_MIN_CELLS = 1 << 22
+
+    def __init__(self, feedback: FeedbackMatrix, workers: int|None = None):
+        self.feedback = feedback
+        self.workers = workers or os.cpu_count() or 1
+        self.patterns = 3 ** feedback.length
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:  # rank can be called from several threads, only one of them starts the pool
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.feedback.path,))
+            return self._pool
+
+    def entropies(self, candidates: np.ndarray) -> np.ndarray:
+        """Entropy of every word of the matrix as a guess against the candidate indices."""
+        candidates = np.asarray(candidates, dtype=np.int64)
+        n = len(self.feedback.words)
+        blocks = [(start, min(start + self.BLOCK_ROWS, n)) for start in range(0, n, self.BLOCK_ROWS)]
+
+        if self.workers == 1 or self.feedback.path is None or n * len(candidates) < self.POOL_MIN_CELLS:
+            return np.concatenate([partition_entropy(self.feedback.block(start, stop, candidates), self.patterns)
+                                   for start, stop in blocks] or [np.zeros(0)])
+
+        pool = self._get_pool()
+        futures = [pool.submit(_score_rows, start, stop, candidates, self.patterns) for start, stop in blocks]
+        return np.concatenate([future.result() for future in futures])
+
+    def rank(self, candidates, k: int = 10) -> list[tuple[str, float]]:
+        """Top k guesses with their entropy in bits; on ties, guesses that could be the solution come first."""
+        candidates = np.asarray(candidates, dtype=np.int64)
+        if len(candidates) <= 2:
+            return [(self.feedback.words[i], float(len(candidates) > 1)) for i in candidates[:k]]
+
+        scores = self.entropies(candidates)
+        is_candidate = np.zeros(len(scores), dtype=bool)
+        is_candidate[candidates] = True
+        order = np.lexsort((~is_candidate, -scores))[:k]
+        return [(self.feedback.words[i], float(scores[i])) for i in order]
+
+    def close(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
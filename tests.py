@@ -1,12 +1,38 @@
 from wordle import *
 from nerdle import *
-from repo import Repository
+from repo import Repository, RepositoryDb, RepositoryBin, csv_to_db
+from ctrl import GameStats
+from feedback import *
+from candidates import *
+from wordindex import WordIndex
+from wordlist import *
+from wordtable import WordTable
+from solver import *
+from evaluate import SolverStrategy, evaluate as evaluate_strategy, play
+from equation import *
+from batch import Batch
+from multiboard import MultiBoard, MultiBoardSimulation
+from tree import DecisionTree, build_tree
+import instrument
+from server import SolverService
+from benchmarks.loadtest import Client
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import io
+import json
+from fractions import Fraction
+import os
+import sys
+import tempfile
+import datetime
 import unittest
 
 
 class TestWordleCtrl(unittest.TestCase):
     def setUp(self):
-        self.controller = WordleCtrl(Repository("data/test_wordles.csv", WordleGame))
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.controller = WordleCtrl(Repository(os.path.join(directory.name, "test_wordles.csv"), WordleGame))
         self.controller.start()
 
     def testA(self):
@@ -68,6 +94,15 @@ class TestWordleSimulation(unittest.TestCase):
         w = WordleSimulation('GREEN')
         assert w.result('EEEGE') == 'Y_GY_'
 
+    def testMany(self):
+        words = TestFeedbackMatrix.WORDS + ['EEEGE']
+        codes = WordleSimulation('green').result_many(words)
+        assert [code_to_result(c, 5) for c in codes] == [WordleSimulation('green').result(w) for w in words]
+        codes = WordleSimulation.result_many_solutions('EEEGE', words)
+        assert [code_to_result(c, 5) for c in codes] == [WordleSimulation(w).result('eeege') for w in words]
+        self.assertRaises(ValueError, WordleSimulation('green').result_many, ['green', 'gree', 'ngreen'])
+        self.assertRaises(ValueError, WordleSimulation('green').result_many, ['gr3en'])
+
 
 class TestNerdleSimulation(unittest.TestCase):
     def testA(self):
@@ -82,6 +117,578 @@ class TestNerdleSimulation(unittest.TestCase):
         assert w.result("54-14=40") == 'YYGY_G__'
         assert w.result("99-55=44") == 'GGGY_GY_'
 
+    def testMany(self):
+        equations = ["15+24=39", "54-14=40", "99-55=44", "99-41=58", "9*9-1=80"]
+        codes = NerdleSimulation("99-41=58").result_many(equations)
+        assert [code_to_result(c, 8) for c in codes] == [NerdleSimulation("99-41=58").result(e) for e in equations]
+        codes = NerdleSimulation.result_many_solutions("99-55=44", equations)
+        assert [code_to_result(c, 8) for c in codes] == [NerdleSimulation(e).result("99-55=44") for e in equations]
+
+
+class TestFeedbackMatrix(unittest.TestCase):
+    WORDS = ['close', 'cheer', 'leave', 'green', 'eeege', 'stunt', 'sonar', 'snafu', 'balsa', 'lasso']
+
+    def testCodes(self):
+        assert code_to_result(result_to_code('Y_GY_'), 5) == 'Y_GY_'
+        codes = pattern_codes(encode_words(self.WORDS), encode_words(self.WORDS))
+        for i, guess in enumerate(self.WORDS):
+            for j, solution in enumerate(self.WORDS):
+                assert code_to_result(codes[i, j], 5) == WordleSimulation(solution).result(guess)
+
+    def testCache(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            matrix = FeedbackMatrix.load(self.WORDS, cache_dir, workers=1)
+            assert matrix.result('eeege', 'green') == 'Y_GY_'
+            assert matrix.result('cheer', 'close') == WordleSimulation('CLOSE').result('CHEER') == 'G_Y__'
+
+            cached = FeedbackMatrix.load(self.WORDS, cache_dir)
+            assert isinstance(cached.data, np.memmap)
+            assert (cached.data == matrix.data).all()
+
+    def testTiled(self):
+        codes = pattern_codes(encode_words(self.WORDS), encode_words(self.WORDS))
+        tiled = TiledFeedback(self.WORDS, tile=3, max_bytes=2 * 9)
+        assert tiled.result('eeege', 'green') == 'Y_GY_'
+        assert (tiled.patterns([9, 0, 4], range(10)) == codes[[9, 0, 4]]).all()
+        assert (tiled.row('cheer') == codes[1]).all()
+        assert tiled.nbytes <= 2 * 9 and len(tiled._tiles) < 12
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            path = TiledFeedback.cache_path(self.WORDS, cache_dir)
+            spilled = TiledFeedback(self.WORDS, path, tile=4)
+            assert (spilled.block(0, 10, np.arange(10)) == codes).all()
+            spilled.close()
+
+            reopened = TiledFeedback(self.WORDS, path, tile=4)
+            assert reopened._done.all()
+            assert (reopened.block(2, 7, [1, 8]) == codes[2:7][:, [1, 8]]).all()
+
+            ranked = Solver(tiled, workers=4).rank(np.arange(10), 3)
+            assert ranked == Solver(FeedbackMatrix.load(self.WORDS, cache_dir, workers=1), workers=1).rank(np.arange(10), 3)
+
+
+class TestWordTable(unittest.TestCase):
+    def test(self):
+        words = TestFeedbackMatrix.WORDS
+        table = WordTable(words)
+        assert list(table) == words and table[2] == 'leave' and table[1:3] == ['cheer', 'leave']
+        assert table.index('snafu') == 7 and 'snafu' in table and 'unset' not in table and 'CLOSE' not in table
+        assert WordTable(sorted(words)).nbytes * 3 < sum(sys.getsizeof(w) + 8 for w in words)  # str + list pointer
+
+        codes = pattern_codes(encode_words(words), encode_words(words))
+        for i, guess in enumerate(words):
+            assert (table.results(guess) == codes[i]).all()
+            assert (table.results(guess, [3, 1]) == codes[i, [3, 1]]).all()
+            assert table.result(guess, 'green') == code_to_result(codes[i, 3], 5)
+
+        equations = WordTable(['12+35=47', '9*8-2=70'], NerdleCtrl.ALPHABET)
+        assert equations.index('9*8-2=70') == 1 and equations.result('12+35=47', '9*8-2=70') == NerdleSimulation('9*8-2=70').result('12+35=47')
+
+
+class TestCandidateFilter(unittest.TestCase):
+    WORDS = ['snafu', 'stunt', 'sonar', 'snuck', 'shunt', 'unset', 'balsa', 'lasso']
+
+    def test(self):
+        runner = WordleRunner()
+        runner.add_try('OCTAL', '___Y_')
+        runner.add_try('SIREN', 'G___Y')
+        runner.add_try('DUMPY', '_Y___')
+
+        word_filter = CandidateFilter(self.WORDS)
+        assert word_filter.filter(*runner.get_data()) == ['snafu']
+        assert word_filter.filter(*WordleRunner().get_data()) == self.WORDS
+
+    def testNarrowing(self):
+        candidates = CandidateSet(CandidateFilter(self.WORDS))
+        candidates.narrow('OCTAL', '___Y_')
+        after_first = candidates.words()
+        candidates.narrow('SIREN', 'G___Y')
+        assert candidates.words() == ['snafu']
+        candidates.pop()
+        assert candidates.words() == after_first
+
+    def testRunnerUndo(self):
+        runner = WordleRunner()
+        runner.add_try('OCTAL', '___Y_')
+        before = runner.get_data()
+        before = before[0], dict(before[1]), dict(before[2])
+        runner.add_try('SIREN', 'G___Y')
+        assert runner.pop_try() == ('siren', 'G___Y')
+        assert runner.get_data() == before
+        assert runner.tries == ['octal']
+
+
+class TestWordIndex(unittest.TestCase):
+    WORDS = ['snafu', 'stunt', 'sonar', 'snuck', 'shunt', 'unset', 'balsa', 'lasso', 'spare', 'snare', 'stare']
+
+    def test(self):
+        index = WordIndex(WordTable(self.WORDS))
+        assert list(index.search({0: 's', 2: 'a', 4: 'e'}, {'r': 1}, 't')) == [8, 9]
+        assert list(index.search(present={'s': 2})) == [7]
+        assert list(index.search(absent="aeiou")) == []
+        assert list(index.search({0: 's'}, not_at={1: 'n'}, within=np.array([0, 1, 4, 8]))) == [1, 4, 8]
+        assert list(index.search({0: 'x'})) == []
+
+    def testSurvivors(self):
+        word_filter = CandidateFilter(self.WORDS)
+        for tried, solution in (('octal', 'snafu'), ('siren', 'stare'), ('lasso', 'balsa')):
+            data = try_constraints(tried, WordleSimulation(solution).result(tried))
+            grays, yellows, greens = data
+            expected = [i for i, w in enumerate(self.WORDS)
+                        if not set(grays) & set(w) and set("".join(yellows.values())) <= set(w)
+                        and all(w[pos-1] not in chars for pos, chars in yellows.items())
+                        and all(w[pos-1] == c for pos, c in greens.items() if c is not None)]
+            assert list(word_filter.survivors(*data)) == expected
+
+
+class TestWordListStore(unittest.TestCase):
+    WORDS = ['snafu', 'stunt', 'sonar', 'snuck', 'shunt', 'unset', 'balsa', 'lasso']
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.dir.name, "words.txt")
+        self.cache = os.path.join(self.dir.name, "words.bin")
+        with open(self.source, "w") as f:
+            f.write("\n".join(self.WORDS) + "\n")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def testTable(self):
+        write_table(self.cache, ['ab', 'abc', ''])
+        assert read_table(self.cache) == ['ab', 'abc', '']
+
+        with open(self.cache, "r+b") as f:
+            f.seek(-1, os.SEEK_END)
+            f.write(b"x")
+        self.assertRaises(WordListError, read_table, self.cache)
+
+    def testOffline(self):
+        store = WordListStore(self.source, self.cache)
+        assert store.load() == self.WORDS
+        assert not store.refresh()
+
+        os.remove(self.source)
+        assert WordListStore(self.source, self.cache).load() == self.WORDS
+        self.assertRaises(WordListError, store.refresh)
+
+    def testCtrl(self):
+        controller = WordleCtrl(Repository(os.path.join(self.dir.name, "wordles.csv"), WordleGame), self.source, self.cache)
+        controller.start()
+        controller.add_try('OCTAL', '___Y_')
+        assert controller.get_possible_solutions() == ['snafu']
+        controller.add_try('UNSET', 'Y_Y__')
+        assert controller.get_possible_solutions() == []
+        controller.pop_try()
+        assert controller.get_possible_solutions() == ['snafu']
+        assert controller.query('s?u??', exclude='t') == ['snuck']
+        assert controller.query('.....', include='ss') == ['lasso']
+        self.assertRaises(ValueError, controller.query, 's?')
+
+
+class TestMultiBoard(unittest.TestCase):
+    WORDS = ['bale', 'ball', 'bell', 'cell', 'call', 'hall', 'tall', 'tell', 'toll', 'dole', 'dell', 'lace']
+
+    def testLength(self):
+        runner = WordleRunner(4)
+        runner.add_try('BALL', 'G_GG')
+        assert runner.green_chars == {1: 'b', 2: None, 3: 'l', 4: 'l'}
+        self.assertRaises(ValueError, runner.add_try, 'balls', '_____')
+        assert CandidateFilter(self.WORDS).filter(*runner.get_data()) == ['bell']
+
+    def test(self):
+        board = MultiBoard(CandidateFilter(self.WORDS), 3)
+        simulation = MultiBoardSimulation(['tell', 'call', 'dole'])
+        board.add_try('bell', simulation.result('bell'))
+        assert board.possible_solutions() == [['cell', 'tell', 'dell'], ['call', 'hall', 'tall', 'toll'], ['dole']]
+        assert (simulation.result_many(['bell', 'tell'])[1] == [80, 72, 21]).all()
+
+        board.add_try('tell', simulation.result('tell'))
+        assert board.solved == [True, False, False]
+        board.add_try('call', [None] + simulation.result('call')[1:])
+        assert board.solved == [True, True, False] and board.possible_solutions()[2] == ['dole']
+
+        board.pop_try()
+        ranking = board.rank(3)
+        assert ranking[0][1] >= ranking[1][1] >= ranking[2][1]
+        with tempfile.TemporaryDirectory() as cache_dir:
+            matrix = FeedbackMatrix.load(self.WORDS, cache_dir, workers=1)
+            assert np.allclose(board.entropies(feedback=matrix), board.entropies())
+
+
+class TestSolver(unittest.TestCase):
+    WORDS = ['snafu', 'stunt', 'sonar', 'snuck', 'shunt', 'unset', 'balsa', 'lasso', 'close', 'cheer', 'leave']
+
+    def test(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            matrix = FeedbackMatrix.load(self.WORDS, cache_dir, workers=1)
+            codes = matrix.row('snafu')[None, :]
+            assert partition_entropy(codes, 243)[0] == partition_entropy(codes[:, ::-1], 243)[0] > 0
+
+            solver = Solver(matrix, workers=1)
+            ranking = solver.rank(np.arange(len(self.WORDS)), 3)
+            assert len(ranking) == 3
+            assert ranking[0][1] >= ranking[1][1] >= ranking[2][1]
+            assert solver.rank([0, 1], 5) == [('snafu', 1.0), ('stunt', 1.0)]
+
+            pooled = Solver(matrix, workers=2)
+            pooled.POOL_MIN_CELLS = 0
+            candidates = np.array([0, 2, 3, 5, 8])
+            assert np.allclose(pooled.entropies(candidates), solver.entropies(candidates))
+            with ThreadPoolExecutor(4) as threads:  # concurrent ranks share the one pool
+                pools = list(threads.map(lambda _: pooled._get_pool(), range(8)))
+            assert all(pool is pools[0] for pool in pools)
+            pooled.close()
+
+
+class TestEvaluate(unittest.TestCase):
+    WORDS = ['snafu', 'stunt', 'sonar', 'snuck', 'shunt', 'unset', 'balsa', 'lasso', 'close', 'cheer', 'leave']
+
+    def test(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            matrix = FeedbackMatrix.load(self.WORDS, cache_dir, workers=1)
+            assert play(SolverStrategy('snafu'), 'snafu', CandidateFilter(self.WORDS), matrix) == 1
+
+            report = evaluate_strategy(SolverStrategy('close'), self.WORDS, feedback=matrix, workers=1, chunk_size=4)
+            assert report.games == len(self.WORDS)
+            assert report.failures == []
+            assert report.distribution[1] == 1
+
+            pooled = evaluate_strategy(SolverStrategy('close'), self.WORDS, feedback=matrix, workers=2, chunk_size=4)
+            assert pooled.distribution == report.distribution
+
+
+class TestDecisionTree(unittest.TestCase):
+    WORDS = ['snafu', 'stunt', 'sonar', 'snuck', 'shunt', 'unset', 'balsa', 'lasso', 'close', 'cheer', 'leave']
+
+    def test(self):
+        with tempfile.TemporaryDirectory() as directory:
+            matrix = FeedbackMatrix.load(self.WORDS, directory, workers=1)
+            tree = build_tree(self.WORDS, 'close', feedback=matrix, workers=1)
+            assert tree.opener == 'close' and tree.lookup([], [])[0] == 'close'
+            for solution in self.WORDS:
+                simulation, tries, results = WordleSimulation(solution), [], []
+                while not tries or tries[-1] != solution:
+                    tries.append(tree.lookup(tries, results)[0])
+                    results.append(simulation.result(tries[-1]))
+                assert len(tries) <= 4
+            assert tree.lookup(['stunt'], ['_____']) is None
+
+            pooled = build_tree(self.WORDS, 'close', feedback=matrix, workers=2)
+            assert (pooled.guess == tree.guess).all() and (pooled.child_node == tree.child_node).all()
+
+            path = DecisionTree.cache_path(self.WORDS, 'close', directory)
+            tree.save(path)
+            assert (DecisionTree.load(path, self.WORDS).child_pattern == tree.child_pattern).all()
+            assert DecisionTree.load(path, self.WORDS[:-1]) is None
+            assert DecisionTree.find(self.WORDS, 'CLOSE', directory) == path == DecisionTree.find(self.WORDS, None, directory)
+            assert DecisionTree.find(self.WORDS, 'lasso', directory) is None and DecisionTree.find(self.WORDS[:-1], None, directory) is None
+
+            source = os.path.join(directory, "words.txt")
+            with open(source, "w") as f:
+                f.write("\n".join(self.WORDS) + "\n")
+            controller = WordleCtrl(Repository(os.path.join(directory, "wordles.csv"), WordleGame), source,
+                                    os.path.join(directory, "words.bin"), tree_path=path)
+            controller._feedback = matrix
+            controller.start()
+            controller.add_try('close', WordleSimulation('lasso').result('close'))
+            assert controller.suggest_guesses(1) == [tree.lookup(['close'], [WordleSimulation('lasso').result('close')])]
+            controller.start()
+            suggestions = controller.suggest_guesses(4)
+            assert suggestions[0] == tree.lookup([], []) and len({guess for guess, _ in suggestions}) == 4
+            assert suggestions[1:] == [s for s in controller.solver.rank(controller.candidates.indices, 4) if s[0] != suggestions[0][0]][:3]
+
+
+class TestEquations(unittest.TestCase):
+    def testGenerate(self):
+        equations = generate_equations(6)
+        assert '1+2=3' not in equations
+        assert {'12+3=15', '3/2*4=6', '19-9=10', '0*100=0'} <= set(generate_equations(7))
+        assert '01+1=2' not in generate_equations(6) and '2-3=-1' not in generate_equations(6)
+
+    def testEvaluate(self):
+        assert evaluate('3/2*4') == 6
+        assert evaluate('1-2*3+4') == -1
+        assert evaluate('7/2') == Fraction(7, 2)
+        for malformed in ('', '1/0', '01+2', '-1+2', '1++2', '2*', '1=1', '1 2', '٣+1'):
+            assert evaluate(malformed) is None
+
+        assert is_valid_equation('3/2*4=06') is False
+        assert is_valid_equation('11+5-7=9') and is_valid_equation('9=11+5-7')
+        assert not is_valid_equation('1/0+8=8') and not is_valid_equation('1+1=2')
+
+    def testValidateMany(self):
+        equations = ['11+5-7=9', '3/2*4=06', '1/0+8=8', '99-41=58', '99-41=57', '1+1=2', '8=8=8+0',
+                     '12*3=036', '9/4*8=18', '٣+5-7=1', '0-99=-99', '96/8/3=4', '2+3*4=14', '20-4*5=0',
+                     'd*10=520', '52*10=d', '1 2+3=15']
+        assert validate_many(equations) == [is_valid_equation(e) for e in equations]
+        assert sum(validate_many(equations)) == 6
+
+    def testCtrl(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = os.path.join(cache_dir, "equations.bin")
+            write_table(cache, ['11+5-7=9', '15+24=39', '17+1-9=9', '99-41=58', '54-14=40', '99-55=44'])
+
+            controller = NerdleCtrl(Repository(os.path.join(cache_dir, "nerdles.csv"), NerdleGame), cache)
+            controller.start()
+            controller.add_try('99-55=44', NerdleSimulation('99-41=58').result('99-55=44'))
+            assert controller.get_possible_solutions() == ['99-41=58']
+            assert controller.pop_try() == ('99-55=44', 'GGGY_GY_')
+            controller.add_try('15+24=39', 'GYG__Y_G')
+            assert controller.get_possible_solutions() == ['11+5-7=9']
+
+
+class TestRepository(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "wordles.csv")
+        self.repo = Repository(self.path, WordleGame)
+        self.start = datetime.date(2024, 1, 1)
+        for i in range(10):
+            self.repo.add(WordleGame(self.start + datetime.timedelta(days=2*i), ['close', 'leave'], ['G_Y__', 'GGGGG'], 'leave'))
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def testIndex(self):
+        assert self.repo.count() == 10
+        assert self.repo.get(self.start + datetime.timedelta(days=4)).date == self.start + datetime.timedelta(days=4)
+        assert self.repo.get(self.start + datetime.timedelta(days=5)) is None
+        assert self.repo.get(None).date == self.start + datetime.timedelta(days=18)
+
+        games = self.repo.get_range(self.start + datetime.timedelta(days=3), self.start + datetime.timedelta(days=8))
+        assert [g.date.day for g in games] == [5, 7, 9]
+
+    def testStats(self):
+        self.repo.add(WordleGame(self.start + datetime.timedelta(days=19), ['close'], ['G_Y__'], 'leave'))
+        self.repo.add(WordleGame(self.start + datetime.timedelta(days=20), ['leave'], ['GGGGG'], 'leave'))
+        assert [g.date for g in self.repo.iter_games()] == [g.date for g in self.repo.get_all()]
+
+        stats = NerdleCtrl(self.repo).get_summary()
+        assert stats.games == 12
+        assert stats.histogram == {2: 11, 1: 1}
+        assert stats.longest_streak() == (3, self.start + datetime.timedelta(days=18), self.start + datetime.timedelta(days=20))
+        assert stats.current_streak(self.start + datetime.timedelta(days=21)) == 3
+        assert stats.current_streak(self.start + datetime.timedelta(days=22)) is None
+
+    def testSnapshot(self):
+        ctrl = NerdleCtrl(self.repo)
+        assert ctrl.get_summary().games == 10
+        assert os.path.exists(self.repo.stats_filename)
+
+        ctrl.store(WordleGame(self.start + datetime.timedelta(days=19), ['leave'], ['GGGGG'], 'leave'))
+        stats = GameStats.load(self.repo.stats_filename)
+        assert stats.games == 11 and list(stats.scores) == [2] * 10 + [1]
+        header = GameStats.load(self.repo.stats_filename, with_scores=False)
+        assert header.games == 11 and len(header.scores) == 0 and header.last_date == self.repo.last_date()
+        assert stats.longest_streak() == (2, self.start + datetime.timedelta(days=18), self.start + datetime.timedelta(days=19))
+        self.assertRaises(ValueError, ctrl.store, WordleGame(self.start + datetime.timedelta(days=20), [], [], 'leave'))
+        assert self.repo.count() == 11 and GameStats.load(self.repo.stats_filename).games == 11
+
+        self.repo.add(WordleGame(self.start + datetime.timedelta(days=20), ['leave'], ['GGGGG'], 'leave'))
+        assert ctrl.get_summary().longest_streak()[0] == 3  # stale snapshot is rebuilt
+
+    def testSidecar(self):
+        with open(self.path, 'a') as f:
+            print(repr(WordleGame(datetime.date(2025, 1, 1), ['leave'], ['GGGGG'], 'leave')), file=f)
+        reopened = Repository(self.path, WordleGame)
+        assert reopened.count() == 11
+        assert reopened.get(datetime.date(2025, 1, 1)).solution == 'LEAVE'
+
+        with open(self.path + ".idx", 'wb') as f:
+            f.write(b"garbage")
+        assert Repository(self.path, WordleGame).get(self.start).date == self.start
+
+
+class TestRepositoryDb(unittest.TestCase):
+    def setUp(self):
+        self.repo = RepositoryDb(":memory:", WordleGame)
+        self.start = datetime.date(2024, 1, 1)
+        for i in range(10):
+            self.repo.add(WordleGame(self.start + datetime.timedelta(days=i), ['close', 'leave'], ['G_Y__', 'GGGGG'], 'leave'))
+
+    def testIterGames(self):
+        games = list(self.repo.iter_games(batch_size=3))
+        assert [g.date for g in games] == [self.start + datetime.timedelta(days=i) for i in range(10)]
+        assert NerdleCtrl(self.repo).get_summary().longest_streak() == (10, self.start, self.start + datetime.timedelta(days=9))
+
+    def testAggregates(self):
+        self.repo.add(WordleGame(self.start + datetime.timedelta(days=12), ['close'], ['G_Y__'], 'leave'))
+        self.repo.add(WordleGame(self.start + datetime.timedelta(days=13), ['leave'], ['GGGGG'], 'leave'))
+        expected = GameStats()
+        for game in self.repo.iter_games():
+            expected.add(game)
+
+        stats = NerdleCtrl(self.repo).get_summary()
+        assert self.repo.score_distribution() == expected.histogram == {2: 11, 1: 1}
+        assert list(stats.scores) == list(expected.scores)
+        assert stats.longest_streak() == expected.longest_streak() == (10, self.start, self.start + datetime.timedelta(days=9))
+        assert self.repo.current_streak(self.start + datetime.timedelta(days=14)) == 2
+        assert stats.current_streak(self.start + datetime.timedelta(days=15)) is None
+
+    def testBulk(self):
+        assert self.repo.count() == 10
+        self.assertRaises(ValueError, self.repo.add, self.repo.get(self.start))
+        games = [WordleGame(self.start + datetime.timedelta(days=i), ['leave'], ['GGGGG'], 'leave') for i in range(5, 15)]
+        assert self.repo.add_many(games) == 5
+        assert self.repo.count() == 15
+        assert self.repo.get(None).date == self.start + datetime.timedelta(days=14)
+        assert len(self.repo.get_range(self.start + datetime.timedelta(days=3), self.start + datetime.timedelta(days=6))) == 4
+
+    def testMigration(self):
+        with tempfile.TemporaryDirectory() as directory:
+            repo_csv = Repository(os.path.join(directory, "wordles.csv"), WordleGame)
+            for game in self.repo.iter_games():
+                repo_csv.add(game)
+            repo_csv.add(self.repo.get(self.start))
+
+            repo_db = RepositoryDb(os.path.join(directory, "wordles.db"), WordleGame)
+            repo_db.add_many(list(repo_csv.iter_games())[:4])
+            assert csv_to_db(repo_csv, repo_db, chunk_size=3) == 6
+            assert csv_to_db(repo_csv, repo_db) == 0
+            assert repo_db.count() == 10
+
+            backup = repo_db.backup(datetime.datetime(2024, 5, 1))
+            assert RepositoryDb(backup, WordleGame).count() == 10
+
+
+class TestRepositoryBin(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "wordles")
+        self.repo = RepositoryBin(self.path, WordleGame)
+        self.start = datetime.date(2024, 1, 1)
+        for i in range(10):
+            self.repo.add(WordleGame(self.start + datetime.timedelta(days=i), ['close', 'leave'], ['G_Y__', 'GGGGG'], 'leave'))
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def testColumns(self):
+        self.assertRaises(ValueError, self.repo.add, self.repo.get(self.start))
+        game = WordleGame(self.start + datetime.timedelta(days=12), ['close', 'cheer'], ['G_Y__', 'G__Y_'], 'leave')
+        assert self.repo.add_many([game, game]) == 1
+
+        reopened = RepositoryBin(self.path, WordleGame)
+        assert reopened.count() == 11
+        assert repr(reopened.get(None)) == repr(game)
+        assert [g.date.day for g in reopened.get_range(self.start + datetime.timedelta(days=8), self.start + datetime.timedelta(days=20))] == [9, 10, 13]
+        self.assertRaises(ValueError, RepositoryBin, self.path, NerdleGame)
+
+        nerdles = RepositoryBin(os.path.join(self.dir.name, "nerdles"), NerdleGame)
+        nerdles.add(NerdleGame(self.start, ['12+35=47', '9*8-2=70'], ['_Y___G_Y', 'GGGGGGGG'], '9*8-2=70'))
+        assert nerdles.get(self.start).results == ['_Y___G_Y', 'GGGGGGGG']
+
+    def testAggregates(self):
+        self.repo.add(WordleGame(self.start + datetime.timedelta(days=12), ['close'], ['G_Y__'], 'leave'))
+        expected = GameStats()
+        for game in self.repo.iter_games():
+            expected.add(game)
+
+        stats = NerdleCtrl(self.repo).get_summary()
+        assert stats.histogram == expected.histogram == {2: 11}
+        assert list(stats.scores) == list(expected.scores)
+        assert stats.longest_streak() == expected.longest_streak()
+        assert self.repo.current_streak(self.start + datetime.timedelta(days=13)) == 1
+
+    def testMigration(self):
+        repo_csv = Repository(os.path.join(self.dir.name, "wordles.csv"), WordleGame)
+        for game in self.repo.iter_games():
+            repo_csv.add(game)
+        repo_bin = RepositoryBin(os.path.join(self.dir.name, "migrated"), WordleGame)
+        assert csv_to_db(repo_csv, repo_bin) == 10
+        assert [repr(g) for g in repo_bin.iter_games()] == [repr(g) for g in self.repo.iter_games()]
+
+
+class TestInstrument(unittest.TestCase):
+    def test(self):
+        original = WordleSimulation.result
+        instrument.enable("json")
+        try:
+            assert WordleSimulation.result is not original
+            WordleSimulation('close').result('cheer')
+            self.assertRaises(ValueError, WordleSimulation('close').result, 'che')
+            repo = RepositoryDb(":memory:", WordleGame)
+            repo.add(WordleGame(datetime.date(2024, 1, 1), ['close'], ['GGGGG'], 'close'))
+            with instrument.timer("block"):
+                repo.get(None)
+
+            report = instrument.report()["operations"]
+            assert report["WordleSimulation.result"]["calls"] == 2 and report["WordleSimulation.result"]["errors"] == 1
+            assert report["RepositoryDb.add"]["calls"] == report["RepositoryDb.get"]["calls"] == report["block"]["calls"] == 1
+            assert "WordleSimulation.result" in instrument.summary()
+        finally:
+            instrument.disable()
+        assert WordleSimulation.result is original and instrument.report()["operations"] == {}
+
+
+class TestBatch(unittest.TestCase):
+    def test(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, "words.txt")
+            with open(source, "w") as f:
+                f.write("\n".join(TestWordListStore.WORDS) + "\n")
+            word_ctrl = WordleCtrl(Repository(os.path.join(directory, "wordles.csv"), WordleGame), source, os.path.join(directory, "words.bin"))
+            nerd_ctrl = NerdleCtrl(RepositoryDb(":memory:", NerdleGame))
+
+            jobs = [
+                {"id": 1, "op": "save", "game": "wordle", "solution": "snafu", "tries": ["unset", "snafu"], "date": "2024-01-01"},
+                {"id": 2, "op": "save", "game": "wordle", "solution": "stunt", "tries": ["stunt"], "date": "2024-01-02"},
+                {"id": 3, "op": "get", "game": "wordle", "date": "2024-01-01"},
+                {"id": 4, "op": "solve", "game": "wordle", "tries": ["octal"], "results": ["___Y_"]},
+                {"id": 5, "op": "stats", "game": "wordle"},
+                {"id": 6, "op": "save", "game": "nerdle", "solution": "1+1=3", "tries": []},
+                {"id": 7, "op": "stats", "game": "chess"},
+                {"id": 8, "op": "save", "game": "wordle", "solution": "snafu", "tries": [], "date": "2024-01-03"},
+                {"id": 9, "op": "save", "game": "wordle", "solution": "snafu", "tries": ["stunt"] * 7, "date": "2024-01-03"},
+                {"id": 10, "op": "stats", "game": "wordle"},
+            ]
+            out = io.StringIO()
+            assert Batch(word_ctrl, nerd_ctrl).run([json.dumps(job) for job in jobs] + ["", "not json"], out) == 11
+            results = [json.loads(line) for line in out.getvalue().splitlines()]
+
+            assert [r.get("id") for r in results] == [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, None]
+            assert [r["ok"] for r in results] == [True] * 5 + [False] * 4 + [True, False]
+            assert results[9]["games"] == 2
+            assert results[2]["game"]["results"] == ["YGY__", "GGGGG"]
+            assert results[3] == {"ok": True, "id": 4, "count": 1, "solutions": ["snafu"]}
+            assert results[4]["histogram"] == {"1": 1, "2": 1}
+            assert results[4]["longest_streak"] == [2, "2024-01-01", "2024-01-02"]
+
+
+class TestServer(unittest.TestCase):
+    def test(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, "words.txt")
+            with open(source, "w") as f:
+                f.write("\n".join(TestWordListStore.WORDS) + "\n")
+            word_ctrl = WordleCtrl(Repository(os.path.join(directory, "wordles.csv"), WordleGame), source, os.path.join(directory, "words.bin"))
+            word_ctrl._feedback = FeedbackMatrix.load(word_ctrl.all_words, directory, workers=1)
+            service = SolverService(word_ctrl, NerdleCtrl(RepositoryDb(":memory:", NerdleGame)), workers=2)
+            asyncio.run(self.play(service))
+            service.close()
+
+    async def play(self, service):
+        server = await service.start("127.0.0.1", 0)
+        client, other = Client(*server.sockets[0].getsockname()[:2]), Client(*server.sockets[0].getsockname()[:2])
+
+        first = (await client.request("POST", "/sessions", {"game": "wordle"}))[1]["session"]
+        second = (await other.request("POST", "/sessions", {}))[1]["session"]
+        assert (await client.request("POST", f"/sessions/{first}/tries", {"try": "octal", "result": "___Y_"})) == (200, {"count": 1})
+        assert (await client.request("GET", f"/sessions/{first}/solutions"))[1] == {"count": 1, "solutions": ["snafu"]}
+        assert (await other.request("GET", f"/sessions/{second}/solutions?limit=2"))[1] == {"count": 8, "solutions": ["snafu", "stunt"]}
+        assert (await other.request("GET", f"/sessions/{second}/suggestions?k=1"))[0] == 200
+
+        assert (await client.request("POST", f"/sessions/{first}/tries", {"try": "octal"}))[0] == 400
+        assert (await client.request("DELETE", f"/sessions/{first}/tries")) == (200, {"count": 8})
+        assert (await client.request("DELETE", f"/sessions/{first}"))[0] == 200
+        assert (await client.request("GET", f"/sessions/{first}"))[0] == 404
+
+        await client.close()
+        await other.close()
+        server.close()
+        await server.wait_closed()
+
 
 if __name__ == '__main__':
     unittest.main()
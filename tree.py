@@ -0,0 +1,210 @@
+"""
+Precomputes the guesses of the solver from a fixed opener: at every node, the answers still possible are split
+by the pattern the node's guess gets against them, and each part gets the solver's best guess. The tree is
+saved as a few flat arrays, and the guess for a history of tries and results is then a dictionary lookup.
+
+    python tree.py --opener salet [--workers 8] [--out data/cache/tree_salet.bin]
+"""
+from utils import *
+from feedback import FeedbackMatrix, code_to_result, pattern_dtype
+from solver import Solver
+from wordtable import WordTable
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import os
+import struct
+import numpy as np
+
+
+HEADER = struct.Struct("<4sHHII20s")  # magic, version, word length, nodes, edges, sha1 of the word list
+MAGIC = b"WTRE"
+VERSION = 1
+
+
+class DecisionTree:
+    """
+    Nodes in breadth-first order, the root playing the opener. Node i plays guess[i] (an index in the word list),
+    with info[i] bits expected; its children, one per pattern that does not end the game, are
+    child_node[first_child[i]:first_child[i+1]] with child_pattern for their patterns.
+    """
+    def __init__(self, words, guess: np.ndarray, info: np.ndarray, first_child: np.ndarray,
+                 child_pattern: np.ndarray, child_node: np.ndarray):
+        self.words = words if isinstance(words, WordTable) else WordTable(words)
+        self.guess = guess
+        self.info = info
+        self.first_child = first_child
+        self.child_pattern = child_pattern
+        self.child_node = child_node
+        self._index = None
+
+    @property
+    def opener(self) -> str:
+        return self.words[int(self.guess[0])]
+
+    def __len__(self):
+        return len(self.guess)
+
+    def _build_index(self) -> dict:
+        """History of (try, result) pairs -> (guess, bits), for every node."""
+        length = self.words.length
+        words = self.words.select(self.guess)
+        index = {(): (words[0], float(self.info[0]))}
+        histories = [()]
+        for node in range(len(self.guess)):
+            history, tried = histories[node], words[node]
+            for edge in range(self.first_child[node], self.first_child[node + 1]):
+                child = int(self.child_node[edge])
+                child_history = history + ((tried, code_to_result(int(self.child_pattern[edge]), length)),)
+                histories.append(child_history)  # children are numbered in breadth-first order, so child == len - 1
+                index[child_history] = (words[child], float(self.info[child]))
+        return index
+
+    def lookup(self, tries: list[str], results: list[str]) -> tuple[str, float]|None:
+        """The guess and its bits after the given tries and results, or None if they left the tree."""
+        if self._index is None:
+            self._index = self._build_index()
+        return self._index.get(tuple(zip(tries, results)))
+
+    @staticmethod
+    def key(words) -> bytes:
+        return bytes.fromhex(FeedbackMatrix.key(words))
+
+    @staticmethod
+    def cache_path(words, opener: str, cache_dir: str = CACHE_DIR) -> str:
+        return os.path.join(cache_dir, f"tree_{opener}_{DecisionTree.key(words).hex()[:12]}.bin")
+
+    @staticmethod
+    def find(words, opener: str|None = None, cache_dir: str = CACHE_DIR) -> str|None:
+        """Path of the tree cached for this word list from the opener, or from any opener if none is given."""
+        if opener is not None:
+            path = DecisionTree.cache_path(words, opener.lower(), cache_dir)
+            return path if os.path.exists(path) else None
+        suffix = f"_{DecisionTree.key(words).hex()[:12]}.bin"
+        try:
+            names = sorted(name for name in os.listdir(cache_dir) if name.startswith("tree_") and name.endswith(suffix))
+        except OSError:
+            return None
+        return os.path.join(cache_dir, names[0]) if names else None
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.words.length, len(self.guess), len(self.child_node), DecisionTree.key(self.words)))
+            for array in (self.guess, self.info, self.first_child, self.child_pattern, self.child_node):
+                array.tofile(f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, words):
+        """The tree saved for this word list, or None if it is missing, unreadable or built for another list."""
+        words = words if isinstance(words, WordTable) else WordTable(words)
+        try:
+            with open(path, "rb") as f:
+                magic, version, length, nodes, edges, key = HEADER.unpack(f.read(HEADER.size))
+                if magic != MAGIC or version != VERSION or key != DecisionTree.key(words):
+                    return None
+                arrays = [np.fromfile(f, dtype=dtype, count=count) for dtype, count in
+                          ((np.int32, nodes), (np.float32, nodes), (np.int32, nodes + 1), (pattern_dtype(length), edges), (np.int32, edges))]
+        except (OSError, struct.error, ValueError):
+            return None
+        if any(len(array) != count for array, count in zip(arrays, (nodes, nodes, nodes + 1, edges, edges))):
+            return None
+        return cls(words, *arrays)
+
+
+def _grow(solver: Solver, guess: int, info: float, candidates: np.ndarray) -> list:
+    """Subtree as nested [guess, info, [(pattern, subtree), ...]] for the candidates, the first guess being given."""
+    feedback = solver.feedback
+    codes = feedback.patterns([guess], candidates)[0]
+    won = 3 ** feedback.length - 1
+    children = []
+    for pattern in np.unique(codes):
+        if pattern == won:
+            continue
+        part = candidates[codes == pattern]
+        best, bits = solver.rank(part, 1)[0]
+        children.append((int(pattern), _grow(solver, feedback.words.index(best), bits, part)))
+    return [guess, info, children]
+
+
+def _grow_part(solver: Solver, candidates: np.ndarray) -> list:
+    best, bits = solver.rank(candidates, 1)[0]
+    return _grow(solver, solver.feedback.words.index(best), bits, candidates)
+
+
+_solver = None
+
+def _init_worker(words, feedback_path: str):
+    global _solver
+    words = WordTable(words)
+    _solver = Solver(FeedbackMatrix(words, np.load(feedback_path, mmap_mode='r'), feedback_path), workers=1)
+
+def _grow_in_worker(candidates: np.ndarray) -> list:
+    return _grow_part(_solver, candidates)
+
+
+def build_tree(words, opener: str, answers=None, feedback: FeedbackMatrix|None = None, workers: int|None = None) -> DecisionTree:
+    """
+    Tree of the solver's guesses from the opener over the answers (all words by default). The parts the opener
+    splits the answers into are grown in parallel, by workers mapping the feedback matrix file themselves.
+    """
+    if feedback is None:
+        feedback = FeedbackMatrix.load(words)
+    words = feedback.words
+    answers = np.arange(len(words)) if answers is None else np.array(sorted(words.index(a) for a in answers))
+    root = words.index(opener.lower())
+    solver = Solver(feedback, workers=1)
+
+    codes = feedback.patterns([root], answers)[0]
+    won = 3 ** feedback.length - 1
+    patterns = [int(p) for p in np.unique(codes) if p != won]
+    parts = [answers[codes == p] for p in patterns]
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or feedback.path is None or len(parts) <= 1:
+        subtrees = [_grow_part(solver, part) for part in parts]
+    else:
+        # largest parts first, so the pool is not left waiting on one big part at the end
+        order = sorted(range(len(parts)), key=lambda i: -len(parts[i]))
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(list(words), feedback.path)) as pool:
+            futures = {i: pool.submit(_grow_in_worker, parts[i]) for i in order}
+            subtrees = [futures[i].result() for i in range(len(parts))]
+
+    info = float(solver.entropies(answers)[root]) if len(answers) > 1 else 0.0
+    return _flatten(words, [root, info, list(zip(patterns, subtrees))], pattern_dtype(feedback.length))
+
+
+def _flatten(words, root: list, dtype) -> DecisionTree:
+    """Numbers the nested nodes breadth first into flat arrays."""
+    guess, info, first_child, child_pattern, child_node = [], [], [0], [], []
+    queue = [root]
+    for node_guess, node_info, children in queue:  # the queue grows while it is read
+        guess.append(node_guess)
+        info.append(node_info)
+        for pattern, child in children:
+            child_pattern.append(pattern)
+            child_node.append(len(queue))
+            queue.append(child)
+        first_child.append(len(child_node))
+    return DecisionTree(words, np.array(guess, dtype=np.int32), np.array(info, dtype=np.float32),
+                        np.array(first_child, dtype=np.int32), np.array(child_pattern, dtype=dtype),
+                        np.array(child_node, dtype=np.int32))
+
+
+if __name__ == '__main__':
+    from wordlist import WordListStore
+
+    parser = argparse.ArgumentParser(description="Precompute the solver's guesses from an opener")
+    parser.add_argument("--opener", required=True)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--words", default=WORDS_LIST_LINK, help="url or file of the word list")
+    parser.add_argument("--length", type=int, default=5, help="only words of this length, as WordleCtrl keeps them")
+    parser.add_argument("--out", default=None, help="file to write, by default in the cache next to the word list")
+    args = parser.parse_args()
+
+    words = WordTable(w for w in WordListStore(args.words).load() if len(w) == args.length)
+    tree = build_tree(words, args.opener, workers=args.workers)
+    path = args.out or DecisionTree.cache_path(words, args.opener.lower())
+    tree.save(path)
+    print(f"{len(tree)} nodes written to {path}")
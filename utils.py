@@ -26,3 +26,4 @@ class GameType(Enum):
     NERDLE = 2
 
 WORDS_LIST_LINK = 'https://raw.githubusercontent.com/tabatkins/wordle-list/main/words'
+CACHE_DIR = 'data/cache'
@@ -0,0 +1,101 @@
+from wordtable import WordTable
+import numpy as np
+
+
+def _bitmaps(flags: np.ndarray) -> np.ndarray:
+    """Boolean array (..., n) as bitmaps (..., ceil(n / 64)) of uint64, word i being bit i % 64 of element i // 64."""
+    n = flags.shape[-1]
+    padded = np.zeros(flags.shape[:-1] + (-(-n // 64) * 64,), dtype=bool)
+    padded[..., :n] = flags
+    return np.packbits(padded, axis=-1, bitorder="little").view(np.uint64)
+
+
+def _postings(keys: np.ndarray, size: int) -> tuple[np.ndarray, np.ndarray]:
+    """Word indices grouped by key (each group sorted), with the offsets of the groups."""
+    order = np.argsort(keys, kind="stable").astype(np.int32)
+    return order, np.searchsorted(keys[order], np.arange(size + 1)).astype(np.int32)
+
+
+class WordIndex:
+    """
+    Inverted index of a WordTable: for every position and character, the words having that character there,
+    and for every character and count k, the words with at least k of it. Each is kept as a bitmap
+    (one bit per word) and the position and presence ones also as sorted posting lists.
+
+    A query starts from its smallest posting list (or the given candidates) and only tests those words
+    against the bitmaps of its other terms, so it costs about the size of that list, not of the dictionary.
+    Queries made only of exclusions combine whole bitmaps instead.
+    """
+    def __init__(self, words: WordTable):
+        self.words = words
+        self.char_codes = words.char_codes
+        codes = words.codes
+        n, length = codes.shape
+        chars = len(words.alphabet)
+        self.length = length
+
+        one_hot = codes.T[:, None, :] == np.arange(chars, dtype=np.uint8)[None, :, None]  # (length, chars, n)
+        self.positions = _bitmaps(one_hot)
+        counts = one_hot.sum(axis=0)  # (chars, n)
+        self.at_least = _bitmaps(counts[:, None, :] >= np.arange(1, length + 1)[None, :, None])  # (chars, length, n)
+
+        postings = [_postings(codes[:, p], chars) for p in range(length)]
+        self.position_postings = [order for order, _ in postings]
+        self.position_offsets = np.stack([offsets for _, offsets in postings])
+        char_of, word_of = np.nonzero(counts)
+        self.presence_postings = word_of.astype(np.int32)
+        self.presence_offsets = np.searchsorted(char_of, np.arange(chars + 1)).astype(np.int32)
+
+    def _code(self, c: str) -> int|None:
+        return self.char_codes.get(c)
+
+    def search(self, greens: dict[int, str]|None = None, present: dict[str, int]|None = None, absent: str = "",
+               not_at: dict[int, str]|None = None, within: np.ndarray|None = None) -> np.ndarray:
+        """
+        Sorted indices of the words with the green character at each position (0-based), at least present[c]
+        times each character c, none of the absent characters, and none of the not_at characters at their positions;
+        only among the `within` indices (sorted) if they are given.
+        """
+        lists, bitmaps, negated = [], [], []
+        for pos, c in (greens or {}).items():
+            code = self._code(c)
+            if code is None:
+                return np.zeros(0, dtype=np.int64)
+            start, stop = self.position_offsets[pos, code], self.position_offsets[pos, code + 1]
+            lists.append(self.position_postings[pos][start:stop])
+            bitmaps.append(self.positions[pos, code])
+        for c, k in (present or {}).items():
+            code = self._code(c)
+            if code is None or k > self.length:
+                return np.zeros(0, dtype=np.int64)
+            if k == 1:
+                lists.append(self.presence_postings[self.presence_offsets[code]:self.presence_offsets[code + 1]])
+            bitmaps.append(self.at_least[code, k - 1])
+        for c in absent:
+            if (code := self._code(c)) is not None:
+                negated.append(self.at_least[code, 0])
+        for pos, chars in (not_at or {}).items():
+            for c in chars:
+                if (code := self._code(c)) is not None:
+                    negated.append(self.positions[pos, code])
+
+        if within is None and not lists:
+            selected = np.bitwise_and.reduce(bitmaps, axis=0) if bitmaps else np.full(self.positions.shape[-1], ~np.uint64(0))
+            for bitmap in negated:
+                selected = selected & ~bitmap
+            bits = np.unpackbits(selected.view(np.uint8), bitorder="little")[:len(self.words)]
+            return np.flatnonzero(bits)
+
+        # start from the shortest list, and only test its words against every term
+        # (testing a word against the bitmap of its own list again is harmless)
+        driver = min(lists, key=len) if lists else None
+        if within is not None and (driver is None or len(within) <= len(driver)):
+            driver, within = within, None
+        driver = np.asarray(driver, dtype=np.int64)
+        word, bit = driver >> 6, (driver & 63).astype(np.uint64)
+        keep = np.ones(len(driver), dtype=bool) if within is None else np.isin(driver, within, assume_unique=True)
+        for bitmap in bitmaps:
+            keep &= (bitmap[word] >> bit) & np.uint64(1) == 1
+        for bitmap in negated:
+            keep &= (bitmap[word] >> bit) & np.uint64(1) == 0
+        return driver[keep]
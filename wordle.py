@@ -1,19 +1,35 @@
 from abstract import *
 from utils import *
 from ctrl import Controller
+from feedback import FeedbackMatrix, encode_many, guesses_codes, solutions_codes, result_to_code, code_to_result
+from candidates import CandidateFilter, CandidateSet, try_constraints
+from wordlist import WordListStore
+from wordtable import WordTable, LETTER_CODES, pack, word_result
+from solver import Solver
+from tree import DecisionTree
 import datetime
-import requests
+import string
+import threading
+import numpy as np
 
 
 class WordleGame(AbstractGame):
+    """A saved game; results are kept as their base-3 codes (see feedback) and decoded when read."""
     NAME = "WORDLE"
+    LENGTH = 5
+    ALPHABET = string.ascii_lowercase
+    __slots__ = ("date", "tries", "codes", "solution")
 
     def __init__(self, date: datetime.date, tries: list[str], results: list[str], solution: str):
         self.date = date
         self.tries = [t.upper() for t in tries]
-        self.results = results
+        self.codes = tuple(result_to_code(r) for r in results)
         self.solution = solution.upper()
 
+    @property
+    def results(self) -> list[str]:
+        return [code_to_result(code, len(self.solution)) for code in self.codes]
+
     @staticmethod
     def from_repr(representation: str):
         date0, tries, results, solution = representation.split(",")
@@ -31,31 +47,34 @@ class WordleGame(AbstractGame):
 
 
 class WordleSimulation(AbstractSimulation):
+    """
+    Results against a solution, computed on the strings (see wordtable.word_result). That is nearly twice as fast
+    as looking them up in a FeedbackMatrix (simulation.wordle vs simulation.wordle.matrix in benchmarks.suite).
+    """
     def __init__(self, solution: str):
         self.solution = solution.lower()
     
     def result(self, word: str) -> str:
-        word_chars = list(word.lower())
-        winner = list(self.solution)
-        res = [ResultKey.GRAY for _ in range(5)]
-
-        for i, c in enumerate(word_chars):
-            if c == winner[i]:
-                res[i] = ResultKey.GREEN
-                word_chars[i] = winner[i] = ResultKey.GRAY
-        
-        for i, c in enumerate(word_chars):
-            if c != ResultKey.GRAY and c in winner:
-                res[i] = ResultKey.YELLOW
-                word_chars[i] = winner[winner.index(c)] = ResultKey.GRAY
+        word = word.lower()
+        if len(word) != len(self.solution):
+            raise ValueError(f"Invalid length. Must be {len(self.solution)} characters long.")
+        return word_result(word, self.solution)
+
+    def result_many(self, words) -> np.ndarray:
+        solution = encode_many(self.solution, len(self.solution), string.ascii_lowercase)[0]
+        return guesses_codes(encode_many(words, len(solution), string.ascii_lowercase, lower=True), solution)
 
-        return "".join(res)
+    @staticmethod
+    def result_many_solutions(word: str, solutions) -> np.ndarray:
+        guess = encode_many(word, len(word), string.ascii_lowercase, lower=True)[0]
+        return solutions_codes(guess, encode_many(solutions, len(guess), string.ascii_lowercase, lower=True))
 
 
 class WordleRunner(AbstractRunner):
-    def __init__(self):
-        self.green_chars: dict[int, str|None] = {1: None, 2: None, 3: None, 4: None, 5: None}
-        self.yellow_chars = {1: "", 2: "", 3: "", 4: "", 5: ""}
+    def __init__(self, length: int = 5):
+        self.length = length
+        self.green_chars: dict[int, str|None] = {i: None for i in range(1, length+1)}
+        self.yellow_chars = {i: "" for i in range(1, length+1)}
         self.gray_chars = ""
         self.solution = None
 
@@ -63,79 +82,163 @@ class WordleRunner(AbstractRunner):
         self.results = []
 
     def add_try(self, word_tried: str, result: str) -> None:
-        WordleRunner.validate_try(word_tried, result)
+        WordleRunner.validate_try(word_tried, result, self.length)
         
         word_tried = word_tried.lower()
         self.tries.append(word_tried)
+        self.results.append(result)
 
-        if set(result) == ResultKey.GREEN:
+        if set(result) == {ResultKey.GREEN}:
             self.solution = word_tried
-            return
-
-        i = 0
-        for c, t in zip(word_tried, result):
-            i += 1
-            
-            match t:
-                case ResultKey.GRAY:
-                    if word_tried.count(c) == 1:
-                        self.gray_chars += c
-                    else:
-                        found_gray = False
-                        for c2, t2 in zip(word_tried, result):
-                            if c2 == c:
-                                if t2 == ResultKey.GRAY:
-                                    found_gray = True
-                                elif t2 == ResultKey.GREEN:
-                                    self.yellow_chars[i] += c
-                                    found_gray = False
-                                    break
-                        if found_gray:
-                            self.gray_chars += c
-                
-                case ResultKey.YELLOW:
-                    self.yellow_chars[i] += c
-                case ResultKey.GREEN:
-                    self.green_chars[i] = c
-                case _:
-                    raise Exception("Invalid result character found.")
+
+        grays, yellows, greens = try_constraints(word_tried, result)
+        self.gray_chars += grays
+        for i in yellows:
+            self.yellow_chars[i] += yellows[i]
+            if greens[i] is not None:
+                self.green_chars[i] = greens[i]
+
+    def pop_try(self) -> tuple[str, str]:
+        """Undoes the last try, returning it with its result."""
+        if len(self.tries) == 0:
+            raise Exception("No try to undo.")
+        tries, results = self.tries[:-1], self.results[:-1]
+        last = self.tries[-1], self.results[-1]
+
+        self.__init__(self.length)
+        for word_tried, result in zip(tries, results):
+            self.add_try(word_tried, result)
+        return last
     
     def get_data(self):
         return self.gray_chars, self.yellow_chars, self.green_chars 
 
     @staticmethod
-    def validate_try(string: str, result: str|None = None) -> None:
-        if len(string) != 5:
-            raise ValueError("Invalid length. Must be 5 characters long.")
-        if not string.isalpha():
+    def validate_try(string: str, result: str|None = None, length: int = 5) -> None:
+        if len(string) != length:
+            raise ValueError(f"Invalid length. Must be {length} characters long.")
+        try:
+            pack(string.lower(), LETTER_CODES)
+        except ValueError:
             raise ValueError("Invalid characters. Must be alphabetic.")
         if result is not None:
-            if len(result) != 5:
-                raise ValueError("Invalid length. Must be 5 characters long.")
+            if len(result) != length:
+                raise ValueError(f"Invalid length. Must be {length} characters long.")
             if not set(result).issubset(set([ResultKey.GRAY, ResultKey.YELLOW, ResultKey.GREEN])):
                 raise ValueError("Invalid characters. Must be one of 'G', 'Y', '_'.")
 
 
 class WordleCtrl(Controller):
-    def __init__(self, repo, all_words_source=WORDS_LIST_LINK):
+    """
+    Checker for words of the given length (5 by default), the other words of the list being ignored.
+    Suggestions follow the decision tree at tree_path, or else the one cached for the word list from tree_opener
+    (from any opener if it is not given).
+    """
+    def __init__(self, repo, all_words_source=WORDS_LIST_LINK, words_cache_path=None, length: int = 5, tree_path=None,
+                 tree_opener: str|None = None):
         self.repo = repo
         super().__init__(WordleRunner)
-        r = requests.get(all_words_source)
-        self.all_words = r.text.split('\n')
+        self.length = length
+        self.tree_path = tree_path
+        self.tree_opener = tree_opener
+        self.word_store = WordListStore(all_words_source, words_cache_path)
+        self._solver = None
+        self._solver_lock = threading.Lock()
+        self._load_words()
+
+    def _load_words(self):
+        if self._solver is not None:
+            self._solver.close()
+        self.all_words = WordTable(w for w in self.word_store.load() if len(w) == self.length)
+        self.word_filter = CandidateFilter(self.all_words)
+        self.candidates = None
+        self._feedback = None
+        self._solver = None
+        # ignored (None) when it was built for another word list
+        tree_path = self.tree_path or DecisionTree.find(self.all_words, self.tree_opener)
+        self.tree = DecisionTree.load(tree_path, self.all_words) if tree_path else None
+
+    def refresh_words(self) -> bool:
+        """Fetches the word list again if it changed, returning whether it did."""
+        if not self.word_store.refresh():
+            return False
+        self._load_words()
+        self.runner = None
+        return True
+
+    def start(self):
+        self.runner = WordleRunner(self.length)
+        self.candidates = CandidateSet(self.word_filter)
+
+    def add_try(self, tried: str, result: str) -> None:
+        super().add_try(tried, result)
+        self.candidates.narrow(tried, result)
+
+    def pop_try(self):
+        last = super().pop_try()
+        self.candidates.pop()
+        return last
+
+    @property
+    def feedback(self) -> FeedbackMatrix:
+        """Pattern of every (guess, solution) pair, built on first use and cached on disk."""
+        if self._feedback is None:
+            self._feedback = FeedbackMatrix.load(self.all_words)
+        return self._feedback
+
+    @property
+    def solver(self) -> Solver:
+        """Solver over the feedback matrix, built once even if several threads ask for it first."""
+        with self._solver_lock:
+            if self._solver is None:
+                self._solver = Solver(self.feedback)
+            return self._solver
+
+    def tree_suggestion(self, runner=None) -> tuple[str, float]|None:
+        """Precomputed next guess for the tries of the runner (the game's by default), if they follow the loaded tree."""
+        runner = runner or self.runner
+        if self.tree is None or runner is None:
+            return None
+        return self.tree.lookup(runner.tries, runner.results)
+
+    def rank_guesses(self, runner, indices: np.ndarray, k: int) -> list[tuple[str, float]]:
+        """
+        Best k guesses for the candidate indices with their expected information in bits. While the runner's tries
+        follow the tree, its guess comes first and only the others are ranked.
+        """
+        suggestion = self.tree_suggestion(runner)
+        if suggestion is None:
+            return self.solver.rank(indices, k)
+        if k <= 1:
+            return [suggestion][:k]
+        others = [guess for guess in self.solver.rank(indices, k) if guess[0] != suggestion[0]]
+        return [suggestion] + others[:k-1]
+
+    def suggest_guesses(self, k: int = 10) -> list[tuple[str, float]]:
+        """Best k next guesses with their expected information in bits, the first one looked up in the tree if possible."""
+        if self.runner is None:
+            raise Exception("Game not started.")
+        return self.rank_guesses(self.runner, self.candidates.indices, k)
+
+    def query(self, pattern: str, include: str = "", exclude: str = "", limit: int|None = None) -> list[str]:
+        """
+        Words of the list matching the pattern ('?' or '.' for any character, e.g. "s?a?e"), containing every
+        character of include (a repeated one at least that many times) and none of exclude.
+        """
+        if len(pattern) != self.length:
+            raise ValueError(f"Invalid length. Must be {self.length} characters long.")
+        pattern, include, exclude = pattern.lower(), include.lower(), exclude.lower()
+        greens = {pos: c for pos, c in enumerate(pattern) if c not in "?."}
+        present = {c: include.count(c) for c in include}
+        return self.all_words.select(self.word_filter.index.search(greens, present, exclude)[:limit])
+
+    def close(self):
+        """Stops the solver's worker processes, if any were started."""
+        if self._solver is not None:
+            self._solver.close()
 
     def get_possible_solutions(self):
         if self.runner is None:
             raise Exception("Game not started.")
         
-        grays, yellows, greens = self.runner.get_data()
-
-        filtered = list(filter(lambda x: len(set(x) & set(grays)) == 0, self.all_words)) # gray
-        filtered = list(filter(lambda x: all([x[i] not in yellows[i+1] for i in range(5)]), filtered)) # yellow
-
-        for y in yellows.values(): # yellow
-            if y != "":
-                filtered = list(filter(lambda x: all([c in x for c in y]), filtered))
-        
-        filtered = list(filter(lambda x: all([True if greens[i+1] is None else x[i] == greens[i+1] for i in range(5)]), filtered)) # green
-
-        return filtered
+        return self.candidates.words()
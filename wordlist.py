@@ -0,0 +1,128 @@
+from utils import *
+import hashlib
+import instrument
+import json
+import mmap
+import os
+import struct
+
+
+class WordListError(Exception):
+    pass
+
+
+HEADER = struct.Struct("<4sHHI32s")  # magic, version, width, count, sha256 of the payload
+MAGIC = b"WLST"
+VERSION = 1
+
+
+def write_table(path: str, words) -> None:
+    """Writes the words as fixed-width, zero-padded ascii rows behind a header with their checksum."""
+    words = list(words)
+    width = max((len(w) for w in words), default=0)
+    payload = b"".join(w.encode("ascii").ljust(width, b"\0") for w in words)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, width, len(words), hashlib.sha256(payload).digest()))
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+def read_table(path: str) -> list[str]:
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < HEADER.size:
+            raise WordListError(f"'{path}' is not a word table.")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            magic, version, width, count, checksum = HEADER.unpack_from(data)
+            if magic != MAGIC or version != VERSION:
+                raise WordListError(f"'{path}' is not a word table.")
+
+            payload = data[HEADER.size:HEADER.size + width * count]
+            if len(payload) != width * count or hashlib.sha256(payload).digest() != checksum:
+                raise WordListError(f"'{path}' is corrupted.")
+
+    text = payload.decode("ascii")
+    return [text[i:i + width].rstrip("\0") for i in range(0, len(text), width)]
+
+
+class WordListStore:
+    """
+    Local cache of a word list. Loading only reads the cached table; the source (url or local text file)
+    is contacted when there is no usable cache or on an explicit refresh, which is conditional
+    on the validators (ETag / Last-Modified / mtime) of the previous fetch.
+    """
+    def __init__(self, source: str = WORDS_LIST_LINK, path: str|None = None):
+        self.source = source
+        if path is None:
+            path = os.path.join(CACHE_DIR, f"words_{hashlib.sha1(source.encode()).hexdigest()[:12]}.bin")
+        self.path = path
+        self.meta_path = path + ".json"
+
+    def load(self) -> list[str]:
+        try:
+            return read_table(self.path)
+        except (OSError, WordListError):
+            pass
+
+        self.refresh(force=True)
+        return read_table(self.path)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Fetches the source if it changed since the last fetch. Returns whether the cache was rewritten."""
+        meta = {}
+        if not force:
+            try:
+                with open(self.meta_path, "r") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                pass
+
+        if self.source.startswith(("http://", "https://")):
+            text, meta = self._fetch_url(meta)
+        else:
+            text, meta = self._read_file(meta)
+        if text is None:
+            return False
+
+        instrument.count("wordlist.fetches")
+        write_table(self.path, [w.strip().lower() for w in text.split("\n") if w.strip()])
+        with open(self.meta_path, "w") as f:
+            json.dump(meta, f)
+        return True
+
+    def _fetch_url(self, meta: dict):
+        import requests
+
+        headers = {}
+        if "etag" in meta:
+            headers["If-None-Match"] = meta["etag"]
+        if "last_modified" in meta:
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            r = requests.get(self.source, headers=headers, timeout=10)
+        except requests.RequestException as e:
+            raise WordListError(f"Could not fetch the word list: {e}")
+        if r.status_code == 304:
+            return None, meta
+        if r.status_code != 200:
+            raise WordListError(f"Could not fetch the word list: HTTP {r.status_code}")
+
+        meta = {}
+        if "ETag" in r.headers:
+            meta["etag"] = r.headers["ETag"]
+        if "Last-Modified" in r.headers:
+            meta["last_modified"] = r.headers["Last-Modified"]
+        return r.text, meta
+
+    def _read_file(self, meta: dict):
+        try:
+            mtime = os.stat(self.source).st_mtime_ns
+            if meta.get("mtime") == mtime:
+                return None, meta
+            with open(self.source, "r") as f:
+                return f.read(), {"mtime": mtime}
+        except OSError as e:
+            raise WordListError(f"Could not read the word list: {e}")
@@ -0,0 +1,260 @@
+from utils import *
+from bisect import bisect_left
+import functools
+import string
+import numpy as np
+
+
+BITS = 5  # bits per character, enough for alphabets of up to 32 characters
+CHAR_MASK = (1 << BITS) - 1
+LETTER_CODES = {c: i for i, c in enumerate(string.ascii_lowercase)}
+
+
+def pack(word: str, char_codes: dict[str, int]) -> int:
+    """Word as an integer of 5 bits per character, the first character in the highest bits."""
+    code = 0
+    for c in word:
+        if c not in char_codes:
+            raise ValueError(f"Invalid character '{c}'.")
+        code = (code << BITS) | char_codes[c]
+    return code
+
+
+def unpack(code: int, length: int, alphabet: str) -> str:
+    return "".join(alphabet[(code >> BITS * (length - 1 - i)) & CHAR_MASK] for i in range(length))
+
+
+def word_result(guess: str, solution: str) -> str:
+    """
+    Result of a guess against a solution of the same length: greens first, then yellows left to right,
+    each taking one unmatched character of the solution.
+    """
+    if guess == solution:
+        return ResultKey.GREEN * len(guess)
+
+    res = []
+    unmatched = ""
+    for c, w in zip(guess, solution):
+        if c == w:
+            res.append(ResultKey.GREEN)
+        else:
+            res.append(ResultKey.GRAY)
+            unmatched += w
+
+    for i, c in enumerate(guess):
+        if res[i] == ResultKey.GRAY and c in unmatched:
+            res[i] = ResultKey.YELLOW
+            unmatched = unmatched.replace(c, "", 1)
+    return "".join(res)
+
+
+def pattern_dtype(length: int):
+    """Smallest unsigned dtype that holds every base-3 pattern code of the given length."""
+    if 3 ** length <= 1 << 8:
+        return np.uint8
+    if 3 ** length <= 1 << 16:
+        return np.uint16
+    return np.uint32
+
+
+def _mask_dtype(length: int):
+    return np.uint16 if length <= 16 else np.uint32
+
+
+@functools.lru_cache(maxsize=None)
+def _base3(length: int) -> np.ndarray:
+    """Pattern code of every bitmask of positions, each position in it counting 1 (yellow) and the others 0."""
+    bits = (np.arange(1 << length)[:, None] >> np.arange(length)) & 1
+    return (bits @ 3 ** np.arange(length)).astype(pattern_dtype(length))
+
+
+def position_masks(word: np.ndarray) -> np.ndarray:
+    """Table from each byte value to the bitmask of the positions of the encoded word holding it."""
+    table = np.zeros(256, dtype=_mask_dtype(len(word)))
+    for position, c in enumerate(word.tolist()):
+        table[c] |= 1 << position
+    return table
+
+
+def score_masks(masks: np.ndarray, by_guess: bool) -> np.ndarray:
+    """
+    Pattern codes of n (guess, solution) pairs, from a (length, n) array: masks[p] is, for position p of the guess
+    (by_guess) or of the solution, the bitmask of the positions of the other word holding the same character.
+    Greens first, then yellows left to right: each position takes the first free position of the other word with
+    its character, which gives the same yellows whichever word the masks are for. Every step is a few bit
+    operations on all the pairs at once, however many characters repeat.
+    """
+    length, n = masks.shape
+    dtype = masks.dtype.type
+    bits = (dtype(1) << np.arange(length, dtype=masks.dtype))[:, None]
+    own = masks & bits
+    greens = np.bitwise_or.reduce(own, axis=0)
+    open_positions = own == 0  # no green there, so the position can take part in a yellow
+    free = ~greens
+    firsts = np.empty_like(masks)
+    for p in range(length):
+        candidates = masks[p] & free
+        candidates *= open_positions[p]
+        np.bitwise_and(candidates, np.negative(candidates), out=firsts[p])
+        free ^= firsts[p]
+    if by_guess:
+        yellows = np.bitwise_or.reduce((firsts != 0) * bits, axis=0)
+    else:
+        yellows = ~(free | greens)  # the guess positions taken by the solution's
+    base3 = _base3(length)
+    return np.take(base3, greens) * 2 + np.take(base3, yellows)
+
+
+def guesses_codes(guesses: np.ndarray, solution: np.ndarray) -> np.ndarray:
+    """Codes of many encoded guesses (n, length) against one encoded solution."""
+    return score_masks(np.take(position_masks(solution), guesses.T), by_guess=True)
+
+
+def solutions_codes(guess: np.ndarray, solutions: np.ndarray) -> np.ndarray:
+    """Codes of one encoded guess against many encoded solutions (n, length)."""
+    return score_masks(np.take(position_masks(guess), solutions.T), by_guess=False)
+
+
+def pattern_codes(guesses: np.ndarray, solutions: np.ndarray, chunk: int = 1 << 22) -> np.ndarray:
+    """
+    Scores every encoded guess against every encoded solution, returning a (guesses, solutions) array of codes.
+    The pairs are scored together, about `chunk` characters at a time, each guess giving its own position masks.
+    """
+    length = guesses.shape[1]
+    out = np.empty((len(guesses), len(solutions)), dtype=pattern_dtype(length))
+    columns = solutions.T.astype(np.int64)
+    step = max(1, chunk // max(1, len(solutions) * length))
+    for start in range(0, len(guesses), step):
+        part = guesses[start:start + step]
+        tables = np.zeros((len(part), 256), dtype=_mask_dtype(length))
+        rows = np.arange(len(part))
+        for position in range(length):
+            tables[rows, part[:, position]] |= 1 << position
+        offsets = np.arange(0, len(part) * 256, 256, dtype=np.int64)
+        masks = np.take(tables, (offsets[None, :, None] + columns[:, None, :]).reshape(length, -1))
+        out[start:start + len(part)] = score_masks(masks, by_guess=False).reshape(len(part), len(solutions))
+    return out
+
+
+class WordTable:
+    """
+    Read-only list of equally long words, each stored as one packed integer (5 bits per character)
+    instead of a Python str per word.
+    Behaves like a sequence of str: words are decoded when they are read. Results against many words are
+    scored from position bitmasks (see score_masks), so no per-word character counts are kept.
+    """
+    def __init__(self, words, alphabet: str = string.ascii_lowercase):
+        if len(alphabet) > 1 << BITS:
+            raise ValueError(f"Alphabet can have at most {1 << BITS} characters.")
+        words = list(words)
+        lengths = {len(w) for w in words}
+        if len(lengths) > 1:
+            raise ValueError("All words must have the same length.")
+        self.length = lengths.pop() if lengths else 0
+        if self.length * BITS > 64:
+            raise ValueError(f"Words can have at most {64 // BITS} characters.")
+
+        self.alphabet = alphabet
+        self.char_codes = {c: i for i, c in enumerate(alphabet)}
+        lookup = np.full(256, 255, dtype=np.uint8)
+        for c, i in self.char_codes.items():
+            lookup[ord(c)] = i
+        self._decode = np.frombuffer(alphabet.encode("ascii"), dtype=np.uint8)
+
+        raw = np.frombuffer("".join(words).encode("ascii"), dtype=np.uint8) if words else np.zeros(0, dtype=np.uint8)
+        codes = lookup[raw].reshape(len(words), self.length)
+        if (codes == 255).any():
+            raise ValueError("Words contain characters outside the alphabet.")
+
+        dtype = np.uint32 if self.length * BITS <= 32 else np.uint64
+        self.packed = np.zeros(len(words), dtype=dtype)
+        for i in range(self.length):
+            self.packed = (self.packed << dtype(BITS)) | codes[:, i].astype(dtype)
+
+        # lookups binary search the packed words, through a permutation only if they are not already sorted
+        self._order = None if (self.packed[1:] >= self.packed[:-1]).all() else np.argsort(self.packed, kind="stable").astype(np.int32)
+
+    def _unpack(self, packed: np.ndarray) -> np.ndarray:
+        shifts = np.arange(self.length - 1, -1, -1, dtype=packed.dtype) * packed.dtype.type(BITS)
+        return ((packed[:, None] >> shifts) & packed.dtype.type(CHAR_MASK)).astype(np.uint8)
+
+    @property
+    def codes(self) -> np.ndarray:
+        """(n, length) uint8 array of the character codes (positions in the alphabet)."""
+        return self._unpack(self.packed)
+
+    def ascii(self, indices=None) -> np.ndarray:
+        """(n, length) uint8 array of the ascii characters, of the given words or all of them."""
+        packed = self.packed if indices is None else self.packed[np.asarray(indices, dtype=np.int64)]
+        return self._decode[self._unpack(packed)]
+
+    def select(self, indices) -> list[str]:
+        """Words at the given indices, decoded together."""
+        text = self.ascii(indices).tobytes().decode("ascii")
+        return [text[i:i + self.length] for i in range(0, len(text), self.length)]
+
+    def encode(self, word: str) -> int:
+        return pack(word, self.char_codes)
+
+    def index(self, word: str) -> int:
+        if len(word) != self.length:
+            raise ValueError(f"'{word}' is not in the table.")
+        try:
+            code = self.encode(word)
+        except ValueError:
+            raise ValueError(f"'{word}' is not in the table.")
+        # bisect on a memoryview compares plain ints, much cheaper than numpy's searchsorted for one key
+        keys = memoryview(self.packed)
+        if self._order is None:
+            i = bisect_left(keys, code)
+        else:
+            order = memoryview(self._order)
+            i = bisect_left(order, code, key=keys.__getitem__)
+            i = order[i] if i < len(order) else i
+        if i == len(keys) or keys[i] != code:
+            raise ValueError(f"'{word}' is not in the table.")
+        return i
+
+    def result(self, guess: str, solution: str) -> str:
+        """Result of guessing a word against a solution (they need not be in the table)."""
+        for word in (guess, solution):
+            if len(word) != self.length:
+                raise ValueError(f"Invalid length. Must be {self.length} characters long.")
+            self.encode(word)  # raises on characters outside the alphabet
+        return word_result(guess, solution)
+
+    def results(self, guess: str, indices=None) -> np.ndarray:
+        """Pattern codes of the guess against every word of the table, or the given indices."""
+        packed = self.packed if indices is None else self.packed[np.asarray(indices, dtype=np.int64)]
+        guess_codes = np.array([self.char_codes[c] for c in guess], dtype=np.uint8)
+        return solutions_codes(guess_codes, self._unpack(packed))
+
+    @property
+    def nbytes(self) -> int:
+        return self.packed.nbytes + (0 if self._order is None else self._order.nbytes)
+
+    def __len__(self):
+        return len(self.packed)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.select(np.arange(len(self))[i])
+        return unpack(int(self.packed[i]), self.length, self.alphabet)
+
+    def __iter__(self):
+        return iter(self.select(np.arange(len(self))))
+
+    def __contains__(self, word) -> bool:
+        try:
+            self.index(word)
+            return True
+        except (ValueError, TypeError):
+            return False
+
+    def __eq__(self, other):
+        if isinstance(other, WordTable):
+            return self.alphabet == other.alphabet and np.array_equal(self.packed, other.packed)
+        return list(self) == other
+
+    def __repr__(self):
+        return f"WordTable({len(self)} words of {self.length})"